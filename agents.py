@@ -1,55 +1,58 @@
 from swarm import Agent
-from aws_tools import  get_ec2_info , launch_ec2_instance , upload_file_to_s3,get_available_files_to_upload
-from azure_tools import deploy_azure_vm
+from aws_tools import  get_ec2_info , get_ec2_inventory , launch_ec2_instance , launch_ec2_fleet , upload_file_to_s3,get_available_files_to_upload, list_s3_buckets, upload_files_to_s3
+from azure_tools import deploy_azure_vm, deploy_azure_vms
 from azure_tools import create_azure_vnet
+from jobs import background_tool, get_job_status, wait_for_job
+from output_budget import budgeted_tool, get_more_output
+from tracing import traced_tool
 
 launchInstanceAgent = Agent(
     name="Launch AWS Instance Agent",
     model = "llama3.2:3b",
     instructions=(
-    "You are responsible only for launching EC2 instances using launch_ec2_instance function tool based on user-provided inputs. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`."
+    "You are responsible only for launching EC2 instances using launch_ec2_instance function tool based on user-provided inputs. When the user wants several identical instances, call launch_ec2_fleet once with the count instead of calling launch_ec2_instance repeatedly. Launches run in the background and return a job ID; use get_job_status or wait_for_job when the user asks about it. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`."
 ),
-    functions=[launch_ec2_instance],
+    functions=[background_tool(launch_ec2_instance), background_tool(launch_ec2_fleet), get_job_status, wait_for_job],
 )
 
 awsS3Agent = Agent(
     name="AWS S3 Agent",
     model = "llama3.2:3b",
     instructions=(
-    "You are responsible only for uploading files to AWS S3. Tell user about available files to upload using get_available_files_to_upload function. Once user provides the file name, bucket name and object name then call upload_file_to_s3 function tool. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`."
+    "You are responsible only for uploading files to AWS S3. Tell user about available files to upload using get_available_files_to_upload function and about existing buckets using list_s3_buckets function. Once user provides the file name, bucket name and object name then call upload_file_to_s3 function tool. If the user wants to upload many files or a whole folder, call upload_files_to_s3 once with a glob pattern or directory instead of uploading files one by one. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`."
 ),
-    functions=[upload_file_to_s3, get_available_files_to_upload],
+    functions=[upload_file_to_s3, upload_files_to_s3, get_available_files_to_upload, list_s3_buckets],
 )
 
 ec2InfoAgent = Agent(
     name="AWS EC2 Info Agent",
     model = "llama3.2:3b",
     instructions=(
-    "You retrieve information about existing EC2 instances. If the user asks to launch a new instance or perform any other task, return control to the `router agent`."
+    "You retrieve information about existing EC2 instances using get_ec2_info. Use its filters (state, tag, instance_type, vpc_id) to narrow results, summary mode for large inventories, and pass next_token to show the next page. Use get_ec2_inventory when the user asks about several regions or all regions. If the user asks to launch a new instance or perform any other task, return control to the `router agent`."
 ),
-    functions=[get_ec2_info],
+    functions=[get_ec2_info, get_ec2_inventory],
 )
 
 azureVMAgent = Agent(
     name="Azure VM Agent",
     model = "llama3.2:3b",
     instructions=
-    "Your task is to deploy azure vm asking required question to the user. You need to ask resource_group_name, location , vm_name, username and password. Once you get the resource group name, location, vm_name, username and password then call the function deploy_azure_vm. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`.",
-    functions=[deploy_azure_vm],
+    "Your task is to deploy azure vm asking required question to the user. You need to ask resource_group_name, location , vm_name, username and password. Once you get the resource group name, location, vm_name, username and password then call the function deploy_azure_vm. To deploy several VMs at once, also ask how many and call deploy_azure_vms with a name_template containing {index} (e.g. web-{index}); they share one VNet and subnet. The deployment runs in the background and returns a job ID; tell the user the job ID and use get_job_status or wait_for_job when they ask about it. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`.",
+    functions=[background_tool(deploy_azure_vm), background_tool(deploy_azure_vms), get_job_status, wait_for_job],
 )
 
 azureVNETAgent = Agent(
     name="Azure VNET Agent",
     model = "llama3.2:3b",
-    instructions="Your task is to create azure vnet. You need to ask resource_group_name, location , vnet_name, subnet_name. Once you get the resource group name, location, vnet_name and subnet_name then call the function create_azure_vnet. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`.",
-    functions=[create_azure_vnet],
+    instructions="Your task is to create azure vnet. You need to ask resource_group_name, location , vnet_name, subnet_name. Once you get the resource group name, location, vnet_name and subnet_name then call the function create_azure_vnet. It runs in the background and returns a job ID; use get_job_status or wait_for_job when the user asks about it. If the user asks about existing EC2 instances or general AWS topics, return control to the `router agent`.",
+    functions=[background_tool(create_azure_vnet), get_job_status, wait_for_job],
 )
 
 routerAgent = Agent(
     name="Router Agent",
     model = "llama3.2:3b",
     instructions=
-    "Your job is to understand user requests and delegate tasks to either the `Launch AWS Instance Agent` or the `AWS S3 Agent` or the `AWS EC2 Info Agent` or the `Azure VM Agent` or the `Azure VNET Agent` based on the request. If the user query is unclear, ask follow-up questions to clarify their intent before delegating."
+    "Your job is to understand user requests and delegate tasks to either the `Launch AWS Instance Agent` or the `AWS S3 Agent` or the `AWS EC2 Info Agent` or the `Azure VM Agent` or the `Azure VNET Agent` based on the request. If the user asks about the status of a background job, use get_job_status or wait_for_job. If the user query is unclear, ask follow-up questions to clarify their intent before delegating."
 ,
 )
 
@@ -125,7 +128,12 @@ def transfer_to_aws_s3_agent():
     """
     return awsS3Agent
 
-routerAgent.functions = [transfer_to_azure_vm_agent, transfer_to_launch_instance_agent, transfer_to_ec2_info_agent, transfer_to_azure_vnet_agent, transfer_to_aws_s3_agent]
+routerAgent.functions = [transfer_to_azure_vm_agent, transfer_to_launch_instance_agent, transfer_to_ec2_info_agent, transfer_to_azure_vnet_agent, transfer_to_aws_s3_agent, get_job_status, wait_for_job]
 
 launchInstanceAgent.functions.append(transfer_back_to_router_agent)
 ec2InfoAgent.functions.append(transfer_back_to_router_agent)
+
+# Every tool result goes through an output budget; oversized results are paged with get_more_output.
+# Every call, including handoffs, is recorded as a trace span.
+for agent in [routerAgent, launchInstanceAgent, awsS3Agent, ec2InfoAgent, azureVMAgent, azureVNETAgent]:
+    agent.functions = [traced_tool(budgeted_tool(f)) for f in agent.functions] + [traced_tool(get_more_output)]
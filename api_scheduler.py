@@ -0,0 +1,308 @@
+from collections import Counter, defaultdict
+import email.utils
+import os
+import random
+import threading
+import time
+import warnings
+
+
+# Attempts per API request, including the first, before an error is returned to the tool.
+API_MAX_ATTEMPTS = int(os.environ.get("API_MAX_ATTEMPTS", "6"))
+# Exponential backoff: the n-th retry waits a random time up to min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2**n).
+API_BACKOFF_BASE = float(os.environ.get("API_BACKOFF_BASE", "0.5"))
+API_BACKOFF_MAX = float(os.environ.get("API_BACKOFF_MAX", "20"))
+
+# Sustained requests per second and burst size per service; 'arm' is Azure Resource Manager.
+RATE_LIMITS = {
+    "ec2": (20, 100),
+    "s3": (500, 1000),
+    "arm": (25, 250),
+}
+DEFAULT_RATE_LIMIT = (50, 100)
+
+
+def _parse_rate_limits(value):
+    # Overrides, e.g. "ec2=10/50,arm=5" (rate/burst; the burst defaults to twice the rate).
+    limits = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        service, _, limit = item.partition("=")
+        rate, _, burst = limit.partition("/")
+        try:
+            rate = float(rate)
+            burst = float(burst or 2 * rate)
+        except ValueError:
+            rate = burst = 0
+        if not service.strip() or rate <= 0 or burst < 1:
+            # A bad entry must not stop the CLI or server from starting; the default limit applies.
+            warnings.warn(f"Ignoring invalid API_RATE_LIMITS entry {item!r}; expected 'service=rate/burst'.")
+            continue
+        limits[service.strip()] = (rate, burst)
+    return limits
+
+
+RATE_LIMITS.update(_parse_rate_limits(os.environ.get("API_RATE_LIMITS", "")))
+
+THROTTLE_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottled", "RequestThrottledException",
+    "RequestLimitExceeded", "TooManyRequestsException", "SlowDown", "ProvisionedThroughputExceededException",
+    "RequestLimitExceededException", "BandwidthLimitExceeded", "EC2ThrottledException", "PriorRequestNotComplete",
+}
+TRANSIENT_CODES = {
+    "InternalError", "InternalFailure", "ServiceUnavailable", "Unavailable", "RequestTimeout",
+    "RequestTimeoutException", "IDPCommunicationError",
+}
+TRANSIENT_STATUSES = {408, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_buckets = {}
+_stats = defaultdict(Counter)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that adapts its rate to throttling.
+
+    Each request takes a token; callers wait when the bucket is empty. A
+    throttling response halves the refill rate (down to a tenth of the
+    configured rate) and every success wins back 2% of the configured rate.
+    """
+
+    def __init__(self, rate, burst):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting for one if needed. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # The token is reserved now, so concurrent callers queue up behind it instead of racing.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.max_rate / 10, self.rate / 2)
+            # Stop bursting: requests already queued are spread out at the lower rate.
+            self._tokens = min(self._tokens, 0.0)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+
+def get_bucket(service):
+    with _lock:
+        bucket = _buckets.get(service)
+        if bucket is None:
+            bucket = _buckets[service] = TokenBucket(*RATE_LIMITS.get(service, DEFAULT_RATE_LIMIT))
+        return bucket
+
+
+def _record(service, **counts):
+    with _lock:
+        _stats[service].update(counts)
+
+
+def stats():
+    """Return the counters of every service seen so far, with each bucket's current rate."""
+    with _lock:
+        result = {service: dict(counts) for service, counts in _stats.items()}
+        for service, bucket in _buckets.items():
+            result.setdefault(service, {})["rate"] = round(bucket.rate, 2)
+    return result
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def format_stats():
+    """Format the counters as one line per service."""
+    lines = []
+    for service, counts in sorted(stats().items()):
+        lines.append(
+            f"{service}: {counts.get('requests', 0)} requests, {counts.get('retries', 0)} retries "
+            f"({counts.get('throttled', 0)} throttled, {counts.get('transient', 0)} transient), "
+            f"{counts.get('permanent', 0)} permanent errors, {counts.get('gave_up', 0)} gave up, "
+            f"{counts.get('rate_wait_seconds', 0):.1f}s rate-limited, "
+            f"{counts.get('backoff_seconds', 0):.1f}s backing off, "
+            f"rate now {counts.get('rate', 0)}/s"
+        )
+    return "\n".join(lines) or "No cloud API calls."
+
+
+def classify(code=None, status=None, connection_error=False):
+    """
+    Classify a failed request as 'throttle', 'transient' or 'permanent'; None means it succeeded.
+
+    Throttles and transient errors are worth retrying; permanent ones (bad
+    parameters, missing resources, denied access) are returned right away.
+    """
+    if connection_error:
+        return "transient"
+    if code in THROTTLE_CODES or status == 429:
+        return "throttle"
+    if code in TRANSIENT_CODES or status in TRANSIENT_STATUSES:
+        return "transient"
+    if code or (status is not None and status >= 400):
+        return "permanent"
+    return None
+
+
+def parse_retry_after(value):
+    """Return the seconds asked for by a Retry-After header (seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(retry, retry_after=None):
+    """
+    Seconds to wait before retry number `retry` (1 for the first retry).
+
+    Full jitter spreads out clients that failed together. A server's
+    Retry-After is always honoured, plus a little jitter.
+    """
+    delay = random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** retry))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, API_BACKOFF_BASE / 2)
+    return delay
+
+
+# AWS: botocore event hooks on every pooled client.
+
+def _aws_before_send(service, **kwargs):
+    waited = get_bucket(service).acquire()
+    _record(service, requests=1, rate_wait_seconds=waited)
+    # Returning None lets botocore send the request.
+
+
+def _aws_needs_retry(service, response=None, attempts=1, caught_exception=None, **kwargs):
+    from botocore.exceptions import ConnectionError, HTTPClientError
+
+    code = status = retry_after = None
+    if response is not None:
+        http_response, parsed = response
+        status = http_response.status_code
+        code = (parsed or {}).get("Error", {}).get("Code")
+        retry_after = parse_retry_after(http_response.headers.get("retry-after"))
+    elif not isinstance(caught_exception, (ConnectionError, HTTPClientError)):
+        # No response and no network error (or nothing failed at all): not a retryable outcome,
+        # and not a success either, so the bucket's rate is left alone.
+        return None
+
+    kind = classify(code, status, response is None)
+    bucket = get_bucket(service)
+    if kind is None:
+        bucket.succeeded()
+        return None
+    if kind == "permanent":
+        _record(service, permanent=1)
+        return None
+    if kind == "throttle":
+        bucket.throttled()
+        _record(service, throttled=1)
+    else:
+        _record(service, transient=1)
+    if attempts >= API_MAX_ATTEMPTS:
+        _record(service, gave_up=1)
+        return None
+
+    delay = backoff_delay(attempts, retry_after)
+    _record(service, retries=1, backoff_seconds=delay)
+    # botocore sleeps for the returned number of seconds and sends the request again.
+    return delay
+
+
+def instrument_boto3_client(client):
+    """
+    Route a boto3 client's requests through the scheduler.
+
+    Every HTTP attempt waits for a token from the service's bucket, and the
+    scheduler alone decides on retries: the client's own retries must be
+    disabled (see aws_clients._client_config).
+    """
+    service = client.meta.service_model.service_name
+    events = client.meta.events
+    events.register(f"before-send.{service}", lambda **kwargs: _aws_before_send(service, **kwargs))
+    events.register_first(f"needs-retry.{service}", lambda **kwargs: _aws_needs_retry(service, **kwargs))
+    return client
+
+
+# Azure: pipeline hooks and retry policy for management clients.
+
+def _azure_retry_policy(service):
+    # azure.core is imported on first use, like the management clients themselves.
+    from azure.core.pipeline.policies import RetryPolicy
+
+    class SchedulerRetryPolicy(RetryPolicy):
+        """Azure's retry loop with the scheduler's jittered backoff, Retry-After handling and counters."""
+
+        def increment(self, settings, response=None, error=None):
+            if error is not None:
+                _record(service, transient=1)
+            more = super().increment(settings, response=response, error=error)
+            if not more:
+                _record(service, gave_up=1)
+            return more
+
+        def sleep(self, settings, transport, response=None):
+            retry_after = self.get_retry_after(response) if response is not None else None
+            delay = backoff_delay(len(settings["history"]), retry_after)
+            _record(service, retries=1, backoff_seconds=delay)
+            transport.sleep(delay)
+
+    return SchedulerRetryPolicy(retry_total=API_MAX_ATTEMPTS - 1, retry_backoff_max=API_BACKOFF_MAX)
+
+
+def azure_client_options(raw_request_hook=None, raw_response_hook=None, service="arm"):
+    """
+    Keyword arguments that route an Azure management client's requests through the scheduler.
+
+    The hooks run on every attempt, long-running operation polls included:
+    requests wait for a token and responses are classified and counted.
+    `raw_request_hook` and `raw_response_hook` (e.g., tracing's) are called
+    after the scheduler's own.
+    """
+    def on_request(request):
+        waited = get_bucket(service).acquire()
+        _record(service, requests=1, rate_wait_seconds=waited)
+        if raw_request_hook:
+            raw_request_hook(request)
+
+    def on_response(response):
+        kind = classify(status=response.http_response.status_code)
+        bucket = get_bucket(service)
+        if kind is None:
+            bucket.succeeded()
+        elif kind == "throttle":
+            bucket.throttled()
+            _record(service, throttled=1)
+        else:
+            _record(service, **{kind: 1})
+        if raw_response_hook:
+            raw_response_hook(response)
+
+    return {
+        "retry_policy": _azure_retry_policy(service),
+        "raw_request_hook": on_request,
+        "raw_response_hook": on_response,
+    }
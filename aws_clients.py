@@ -0,0 +1,158 @@
+import os
+import threading
+
+import api_scheduler
+from tracing import instrument_boto3_client
+
+
+DEFAULT_REGION = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
+
+# Connection pool settings shared by every client created through this module.
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "20"))
+TCP_KEEPALIVE = os.environ.get("AWS_TCP_KEEPALIVE", "true").lower() in ("1", "true", "yes")
+
+_lock = threading.RLock()
+_sessions = {}
+_clients = {}
+
+
+def _client_config():
+    # boto3 and botocore are imported on first use; together they take a few hundred ms to import.
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        tcp_keepalive=TCP_KEEPALIVE,
+        # Retries are decided by api_scheduler, which also rate-limits every attempt.
+        retries={"mode": "standard", "total_max_attempts": 1},
+    )
+
+
+def get_session(profile_name=None):
+    """
+    Return the shared boto3 session for a credentials profile.
+
+    boto3 sessions are not thread-safe to create concurrently, so creation
+    happens under the registry lock. The session is reused until
+    `invalidate_clients` is called for its profile.
+
+    Parameters
+    ----------
+    profile_name : str, optional
+        The AWS credentials profile. If not provided, the default credential chain is used.
+
+    Returns
+    -------
+    boto3.session.Session
+        The cached session.
+    """
+    with _lock:
+        session = _sessions.get(profile_name)
+        if session is None:
+            import boto3.session
+
+            session = boto3.session.Session(profile_name=profile_name)
+            _sessions[profile_name] = session
+        return session
+
+
+def get_client(service_name, region_name=None, profile_name=None):
+    """
+    Return a pooled boto3 client keyed by (service, region, profile).
+
+    Clients are created once and reused across tool calls, so credential
+    resolution, service model loading and the HTTP connection pool are only
+    paid for on the first call. boto3 clients are thread-safe and can be
+    shared between threads.
+
+    Parameters
+    ----------
+    service_name : str
+        The AWS service name (e.g., 'ec2', 's3').
+    region_name : str, optional
+        The AWS region. If not provided, the session's configured region is used.
+    profile_name : str, optional
+        The AWS credentials profile. If not provided, the default credential chain is used.
+
+    Returns
+    -------
+    botocore.client.BaseClient
+        The cached client.
+    """
+    session = get_session(profile_name)
+    region_name = region_name or session.region_name
+    key = (service_name, region_name, profile_name)
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = session.client(service_name, region_name=region_name, config=_client_config())
+            # Every API call made through a pooled client is recorded as a trace span.
+            instrument_boto3_client(client)
+            api_scheduler.instrument_boto3_client(client)
+            _clients[key] = client
+        return client
+
+
+def invalidate_clients(profile_name=None, service_name=None):
+    """
+    Drop cached clients (and sessions) so the next call re-resolves credentials.
+
+    Call this after credentials rotate. With no arguments every cached client
+    and session is dropped.
+
+    Parameters
+    ----------
+    profile_name : str, optional
+        Only drop clients and the session for this profile.
+    service_name : str, optional
+        Only drop clients for this service. The session is kept.
+
+    Returns
+    -------
+    int
+        The number of clients dropped.
+    """
+    with _lock:
+        match_all = profile_name is None and service_name is None
+        stale = [
+            key for key in _clients
+            if match_all
+            or ((profile_name is None or key[2] == profile_name)
+                and (service_name is None or key[0] == service_name))
+        ]
+        for key in stale:
+            _clients.pop(key).close()
+
+        if service_name is None:
+            if match_all:
+                _sessions.clear()
+            else:
+                _sessions.pop(profile_name, None)
+
+        return len(stale)
+
+
+def configure(max_pool_connections=None, tcp_keepalive=None):
+    """
+    Change the connection pool settings and rebuild clients on next use.
+
+    Parameters
+    ----------
+    max_pool_connections : int, optional
+        Maximum number of pooled HTTP connections per client.
+    tcp_keepalive : bool, optional
+        Whether to enable TCP keep-alive on pooled connections.
+    """
+    global MAX_POOL_CONNECTIONS, TCP_KEEPALIVE
+
+    with _lock:
+        if max_pool_connections is not None:
+            MAX_POOL_CONNECTIONS = int(max_pool_connections)
+        if tcp_keepalive is not None:
+            TCP_KEEPALIVE = bool(tcp_keepalive)
+        invalidate_clients()
@@ -1,11 +1,56 @@
-import boto3
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError, WaiterError
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+import contextvars
+import glob
+import heapq
 import os
+import threading
+import time
+import uuid
 
-def launch_ec2_instance(name, image_id, architecture, instance_type, key_pair):
+from aws_clients import DEFAULT_REGION, get_client
+from file_catalog import get_catalog
+import progress
+from resource_state import fingerprint, get_state
+import s3_transfer
+from tool_cache import cached_tool, invalidates
+
+UPLOAD_DIR = 'samplefiles'
+BULK_UPLOAD_MAX_WORKERS = int(os.environ.get("S3_BULK_UPLOAD_MAX_WORKERS", "8"))
+# Files listed per page by get_available_files_to_upload.
+FILE_LIST_PAGE_SIZE = int(os.environ.get("FILE_LIST_PAGE_SIZE", "50"))
+
+# EC2 launches running in this process, by resource state key; only their own call may reuse their token.
+_launches_in_flight = set()
+_launch_lock = threading.Lock()
+
+# Buckets known to exist, shared by every upload in this process.
+_known_buckets = set()
+# One lock per bucket name, so cold checks of different buckets run in parallel.
+_bucket_locks = {}
+_bucket_lock = threading.Lock()
+
+# Regions queried by get_ec2_inventory when none are given. Empty means every enabled region.
+INVENTORY_REGIONS = os.environ.get("AWS_INVENTORY_REGIONS", "")
+INVENTORY_MAX_WORKERS = int(os.environ.get("AWS_INVENTORY_MAX_WORKERS", "8"))
+INVENTORY_REGION_TIMEOUT = float(os.environ.get("AWS_INVENTORY_REGION_TIMEOUT", "30"))
+
+
+def _is_not_error(result):
+    return not (isinstance(result, str) and result.startswith("An error occurred"))
+
+
+@invalidates('ec2')
+def launch_ec2_instance(name, image_id, architecture, instance_type, key_pair, region=None):
     """
     Launch a new EC2 instance with specified parameters.
 
+    A launch whose outcome was lost (e.g., to a timeout or a restart) is
+    retried with the same idempotency token, so EC2 returns the instance it
+    may already have started instead of launching a second one. Once a
+    launch has completed, the next call launches a new instance.
+
     Parameters
     ----------
     name : str
@@ -18,26 +63,24 @@ def launch_ec2_instance(name, image_id, architecture, instance_type, key_pair):
         The type of the EC2 instance (e.g., 't2.micro').
     key_pair : str
         The name of the key pair to associate with the instance.
+    region : str, optional
+        The AWS region to launch in. Defaults to AWS_DEFAULT_REGION or 'us-east-1'.
 
     Returns
     -------
     dict
         A dictionary containing details about the launched instance, or an error message if the operation fails.
     """
-    ec2_client = boto3.client('ec2', region_name='us-east-1')
+    region = region or DEFAULT_REGION
+    ec2_client = get_client('ec2', region_name=region)
     try:
-        print(f"Launching EC2 instance with the following details:\n"
-              f"Name: {name}, Image ID: {image_id}, Architecture: {architecture}, "
-              f"Instance Type: {instance_type}, Key Pair: {key_pair}")
-        
-        # Launch EC2 instance
-        response = ec2_client.run_instances(
-            ImageId=image_id,
-            InstanceType=instance_type,
-            MinCount=1,
-            MaxCount=1,
-            KeyName=key_pair,
-            TagSpecifications=[
+        params = {
+            'ImageId': image_id,
+            'InstanceType': instance_type,
+            'MinCount': 1,
+            'MaxCount': 1,
+            'KeyName': key_pair,
+            'TagSpecifications': [
                 {
                     'ResourceType': 'instance',
                     'Tags': [
@@ -46,19 +89,22 @@ def launch_ec2_instance(name, image_id, architecture, instance_type, key_pair):
                     ]
                 }
             ]
-        )
-        
-        # Extract instance details
-        instance = response['Instances'][0]
-        instance_id = instance['InstanceId']
-        print(f"EC2 instance launched successfully! Instance ID: {instance_id}")
-        
-        return {
-            "InstanceId": instance_id,
-            "State": instance['State']['Name'],
-            "PublicIpAddress": instance.get('PublicIpAddress', 'N/A'),
-            "InstanceType": instance['InstanceType']
         }
+
+        progress.emit(f"Launching EC2 instance {name}: {instance_type} ({architecture}) from {image_id}, "
+                      f"key pair {key_pair}")
+
+        key = f"ec2/{region}/instances/{name}"
+        with _launch_lock:
+            # A launch of the same name running right now is a separate instance, not one to resume.
+            concurrent = key in _launches_in_flight
+            _launches_in_flight.add(key)
+        try:
+            return _launch_instance(ec2_client, params, key, None if concurrent else get_state())
+        finally:
+            if not concurrent:
+                with _launch_lock:
+                    _launches_in_flight.discard(key)
     
     except (NoCredentialsError, PartialCredentialsError):
         return {"Error": "AWS credentials not found or incomplete!"}
@@ -66,13 +112,226 @@ def launch_ec2_instance(name, image_id, architecture, instance_type, key_pair):
         return {"Error": str(e)}
 
 
-def get_ec2_info():
+def _launch_instance(ec2_client, params, key, state):
+    # Only a launch that never reported back is pending in the state index; retrying it with its
+    # token makes EC2 return that launch if it happened. Completed launches are not recorded.
+    spec_fingerprint = fingerprint(params)
+    entry = state.get(key) if state is not None else None
+    if entry is not None and entry["fingerprint"] == spec_fingerprint and entry["token"]:
+        client_token = entry["token"]
+    else:
+        client_token = uuid.uuid4().hex
+    if state is not None:
+        state.record(key, spec_fingerprint, token=client_token)
+
+    try:
+        response = ec2_client.run_instances(ClientToken=client_token, **params)
+    except ClientError:
+        # EC2 turned the launch down, so nothing is running and the next attempt starts afresh.
+        if state is not None:
+            state.forget(key)
+        raise
+
+    # Extract instance details
+    instance = response['Instances'][0]
+    instance_id = instance['InstanceId']
+    if state is not None:
+        state.forget(key)
+    progress.emit(f"EC2 instance launched: {instance_id}", done=True)
+
+    return {
+        "InstanceId": instance_id,
+        "State": instance['State']['Name'],
+        "PublicIpAddress": instance.get('PublicIpAddress', 'N/A'),
+        "InstanceType": instance['InstanceType']
+    }
+
+
+# Fields that can be projected by get_ec2_info, mapped to (label, getter).
+EC2_INFO_FIELDS = {
+    'InstanceId': ("Instance ID", lambda i: i.get('InstanceId', 'N/A')),
+    'Name': ("Name", lambda i: next((t['Value'] for t in i.get('Tags', []) if t['Key'] == 'Name'), 'N/A')),
+    'InstanceType': ("Type", lambda i: i.get('InstanceType', 'N/A')),
+    'State': ("State", lambda i: i.get('State', {}).get('Name', 'N/A')),
+    'PublicIpAddress': ("Public IP", lambda i: i.get('PublicIpAddress', 'N/A')),
+    'PrivateIpAddress': ("Private IP", lambda i: i.get('PrivateIpAddress', 'N/A')),
+    'VpcId': ("VPC", lambda i: i.get('VpcId', 'N/A')),
+    'SubnetId': ("Subnet", lambda i: i.get('SubnetId', 'N/A')),
+    'AvailabilityZone': ("AZ", lambda i: i.get('Placement', {}).get('AvailabilityZone', 'N/A')),
+    'ImageId': ("Image ID", lambda i: i.get('ImageId', 'N/A')),
+    'KeyName': ("Key Pair", lambda i: i.get('KeyName', 'N/A')),
+    'LaunchTime': ("Launched", lambda i: str(i.get('LaunchTime', 'N/A'))),
+}
+DEFAULT_EC2_INFO_FIELDS = ['InstanceId', 'InstanceType', 'State', 'PublicIpAddress', 'PrivateIpAddress']
+
+
+def _split_values(value):
+    return [v.strip() for v in str(value).split(',') if v.strip()]
+
+
+def build_ec2_filters(state=None, tag=None, instance_type=None, vpc_id=None):
     """
-    This function retrieves information about existing EC2 instances.
+    Build a server-side `Filters=` list for describe_instances.
 
     Parameters
     ----------
-    None
+    state : str, optional
+        Comma-separated instance states (e.g., 'running,stopped').
+    tag : str, optional
+        A tag filter, either 'Key=Value' or just 'Key' to match any value.
+    instance_type : str, optional
+        Comma-separated instance types (e.g., 't2.micro,t3.small').
+    vpc_id : str, optional
+        Comma-separated VPC IDs.
+
+    Returns
+    -------
+    list
+        The filters, empty if no criteria were given.
+    """
+    filters = []
+    if state:
+        filters.append({'Name': 'instance-state-name', 'Values': _split_values(state)})
+    if tag:
+        key, _, value = str(tag).partition('=')
+        if value:
+            filters.append({'Name': f'tag:{key.strip()}', 'Values': _split_values(value)})
+        else:
+            filters.append({'Name': 'tag-key', 'Values': [key.strip()]})
+    if instance_type:
+        filters.append({'Name': 'instance-type', 'Values': _split_values(instance_type)})
+    if vpc_id:
+        filters.append({'Name': 'vpc-id', 'Values': _split_values(vpc_id)})
+    return filters
+
+
+def iter_ec2_instances(ec2_client, filters=None, page_size=100, starting_token=None):
+    """
+    Lazily page through describe_instances.
+
+    Parameters
+    ----------
+    ec2_client : botocore.client.EC2
+        The EC2 client to query.
+    filters : list, optional
+        Server-side filters, as built by `build_ec2_filters`.
+    page_size : int, optional
+        Number of instances requested per API call (5-1000).
+    starting_token : str, optional
+        A NextToken from a previous page to resume from.
+
+    Yields
+    ------
+    tuple
+        (instances, next_token) for each API page. `next_token` is None on the last page.
+    """
+    paginator = ec2_client.get_paginator('describe_instances')
+    pagination_config = {'PageSize': max(5, min(int(page_size), 1000))}
+    if starting_token:
+        pagination_config['StartingToken'] = starting_token
+
+    for page in paginator.paginate(Filters=filters or [], PaginationConfig=pagination_config):
+        instances = [instance for reservation in page['Reservations'] for instance in reservation['Instances']]
+        yield instances, page.get('NextToken')
+
+
+def _parse_fields(fields):
+    fields = _split_values(fields) if fields else DEFAULT_EC2_INFO_FIELDS
+    unknown = [f for f in fields if f not in EC2_INFO_FIELDS]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(EC2_INFO_FIELDS)}"
+    return fields, None
+
+
+def _format_instance(instance, fields):
+    return ", ".join(f"{EC2_INFO_FIELDS[f][0]}: {EC2_INFO_FIELDS[f][1](instance)}" for f in fields)
+
+
+class _InstanceSummary:
+    """Streaming counts by state and type plus the N most recently launched instances."""
+
+    def __init__(self, top_n):
+        self.top_n = top_n
+        self.total = 0
+        self.by_state = Counter()
+        self.by_type = Counter()
+        self._newest = []
+        self._seq = 0
+
+    def add(self, instance, label=None):
+        self.total += 1
+        self.by_state[EC2_INFO_FIELDS['State'][1](instance)] += 1
+        self.by_type[instance.get('InstanceType', 'N/A')] += 1
+        self._push_newest(instance, label)
+
+    def _push_newest(self, instance, label):
+        launched = instance.get('LaunchTime')
+        self._seq += 1
+        entry = (launched.timestamp() if hasattr(launched, 'timestamp') else 0, self._seq, label, instance)
+        if len(self._newest) < self.top_n:
+            heapq.heappush(self._newest, entry)
+        elif self._newest and entry > self._newest[0]:
+            heapq.heapreplace(self._newest, entry)
+
+    def merge(self, other, label=None):
+        self.total += other.total
+        self.by_state.update(other.by_state)
+        self.by_type.update(other.by_type)
+        for _, _, _, instance in other._newest:
+            self._push_newest(instance, label)
+
+    def format(self, fields):
+        lines = [
+            f"Total instances: {self.total}",
+            "By state: " + ", ".join(f"{k}={v}" for k, v in self.by_state.most_common()),
+            "By type: " + ", ".join(f"{k}={v}" for k, v in self.by_type.most_common()),
+        ]
+        if self._newest:
+            lines.append(f"Most recently launched {len(self._newest)}:")
+            for _, _, label, instance in sorted(self._newest, reverse=True):
+                prefix = f"[{label}] " if label else ""
+                lines.append(prefix + _format_instance(instance, fields))
+        return "\n".join(lines)
+
+
+def _summarize_instances(pages, top_n):
+    summary = _InstanceSummary(top_n)
+    for instances, _ in pages:
+        for instance in instances:
+            summary.add(instance)
+    return summary
+
+
+@cached_tool(ttl=30, tags=('ec2',), cache_if=_is_not_error)
+def get_ec2_info(state=None, tag=None, instance_type=None, vpc_id=None, fields=None,
+                 max_results=20, summary=False, next_token=None, region=None):
+    """
+    This function retrieves information about existing EC2 instances, one page at a time.
+
+    Parameters
+    ----------
+    state : str, optional
+        Only include instances in these comma-separated states (e.g., 'running,stopped').
+    tag : str, optional
+        Only include instances with this tag, given as 'Key=Value' or just 'Key'.
+    instance_type : str, optional
+        Only include instances of these comma-separated types (e.g., 't2.micro').
+    vpc_id : str, optional
+        Only include instances in these comma-separated VPC IDs.
+    fields : str, optional
+        Comma-separated fields to show. Available: InstanceId, Name, InstanceType, State,
+        PublicIpAddress, PrivateIpAddress, VpcId, SubnetId, AvailabilityZone, ImageId,
+        KeyName, LaunchTime.
+    max_results : int, optional
+        Maximum number of instances to return in this page (default 20). In summary mode,
+        the number of most recently launched instances to list.
+    summary : bool, optional
+        If true, return counts by state and type plus the most recently launched instances
+        instead of a page of instances.
+    next_token : str, optional
+        The token returned by a previous call, to fetch the next page.
+    region : str, optional
+        The AWS region to query. Defaults to AWS_DEFAULT_REGION or 'us-east-1'.
 
     Returns
     -------
@@ -81,46 +340,525 @@ def get_ec2_info():
     """
     try:
         # Initialize the EC2 client
-        ec2_client = boto3.client('ec2' , region_name='us-east-1')
-
-        print("EC2 CLIENT IS : " , ec2_client)
-        
-        # Retrieve information about all instances
-        response = ec2_client.describe_instances()
-
-        # Parse and extract useful information
-        instances_info = []
-        for reservation in response['Reservations']:
-            for instance in reservation['Instances']:
-                instance_id = instance.get('InstanceId', 'N/A')
-                instance_type = instance.get('InstanceType', 'N/A')
-                state = instance['State'].get('Name', 'N/A')
-                public_ip = instance.get('PublicIpAddress', 'N/A')
-                private_ip = instance.get('PrivateIpAddress', 'N/A')
-
-                instances_info.append(
-                    f"Instance ID: {instance_id}, Type: {instance_type}, "
-                    f"State: {state}, Public IP: {public_ip}, Private IP: {private_ip}"
-                )
+        ec2_client = get_client('ec2', region_name=region or DEFAULT_REGION)
+
+        fields, error = _parse_fields(fields)
+        if error:
+            return error
 
-        if not instances_info:
+        filters = build_ec2_filters(state, tag, instance_type, vpc_id)
+        max_results = int(max_results or 20)
+        summary = str(summary).lower() in ('true', '1', 'yes')
+
+        if summary:
+            result = _summarize_instances(iter_ec2_instances(ec2_client, filters, page_size=1000), max_results)
+            if not result.total:
+                return "No EC2 instances found in the current AWS account."
+            return result.format(fields)
+
+        # EC2 returns at least 5 instances per page, so a smaller page is a slice of an API page. Its
+        # token, '@<skip>@<api token>', resumes that API page after the instances already returned.
+        skip = 0
+        if next_token and next_token.startswith('@'):
+            skip, _, next_token = next_token[1:].partition('@')
+            skip, next_token = int(skip), next_token or None
+
+        # Only the first non-empty API page is fetched; the agent asks for more with next_token.
+        pages = iter_ec2_instances(ec2_client, filters, page_size=min(skip + max_results, 1000),
+                                   starting_token=next_token)
+        instances, token, page_token = [], None, next_token
+        for instances, token in pages:
+            instances = instances[skip:]
+            # Server-side filters can yield empty pages that still carry a NextToken.
+            if instances or not token:
+                break
+            skip, page_token = 0, token
+
+        if not instances:
             return "No EC2 instances found in the current AWS account."
-        
+        if len(instances) > max_results:
+            instances = instances[:max_results]
+            token = f"@{skip + max_results}@{page_token or ''}"
+
+        instances_info = [_format_instance(instance, fields) for instance in instances]
+        if token:
+            instances_info.append(
+                f"More instances available. Call get_ec2_info again with next_token='{token}' for the next page."
+            )
         return "\n".join(instances_info)
 
     except Exception as e:
         return f"An error occurred while retrieving EC2 information: {str(e)}"
 
 
-def get_available_files_to_upload():
+def list_enabled_regions():
+    """
+    Return the regions enabled for this account, in name order.
+
+    Returns
+    -------
+    list
+        Region names (e.g., ['ap-south-1', 'us-east-1']).
+    """
+    ec2_client = get_client('ec2', region_name=DEFAULT_REGION)
+    response = ec2_client.describe_regions(
+        Filters=[{'Name': 'opt-in-status', 'Values': ['opt-in-not-required', 'opted-in']}]
+    )
+    return sorted(r['RegionName'] for r in response['Regions'])
+
+
+def run_concurrently(func, items, max_workers=None, timeout=None):
+    """
+    Call `func(item)` for every item concurrently on a bounded thread pool.
+
+    Each item is isolated: an exception or a timeout for one item is recorded
+    in its result and never blocks or fails the others. Items still running
+    when `timeout` expires are reported as timed out and abandoned.
+
+    Parameters
+    ----------
+    func : callable
+        Called with a single item.
+    items : list
+        The items to process.
+    max_workers : int, optional
+        Maximum number of items processed at once. Defaults to INVENTORY_MAX_WORKERS.
+    timeout : float, optional
+        Seconds to wait for all items. If not provided, wait until all are done.
+
+    Returns
+    -------
+    list
+        One dict per item, in input order, with keys 'item', 'result', 'error' and 'seconds'.
+    """
+    results = [{'item': item, 'result': None, 'error': None, 'seconds': None} for item in items]
+
+    def timed(index):
+        start = time.perf_counter()
+        try:
+            results[index]['result'] = func(items[index])
+        except Exception as e:
+            results[index]['error'] = str(e)
+        finally:
+            results[index]['seconds'] = time.perf_counter() - start
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or INVENTORY_MAX_WORKERS)
     try:
-        files = os.listdir('samplefiles')
-        return '\n'.join(files)
+        # Items run in copies of the caller's context so their trace spans nest under the caller's.
+        futures = {executor.submit(contextvars.copy_context().run, timed, index): index
+                   for index in range(len(items))}
+        _, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            index = futures[future]
+            results[index]['error'] = f"timed out after {timeout:g}s"
+            results[index]['seconds'] = timeout
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Copies, so items abandoned after the timeout cannot change what we return.
+    return [dict(result) for result in results]
+
+
+def run_in_regions(func, regions, max_workers=None, timeout=None):
+    """
+    Call `func(region)` for every region concurrently, isolating slow or failing regions.
+
+    Parameters
+    ----------
+    func : callable
+        Called with a single region name.
+    regions : list
+        The regions to run in.
+    max_workers : int, optional
+        Maximum number of regions queried at once. Defaults to INVENTORY_MAX_WORKERS.
+    timeout : float, optional
+        Seconds to wait for all regions. Defaults to INVENTORY_REGION_TIMEOUT.
+
+    Returns
+    -------
+    list
+        One dict per region, in input order, with keys 'region', 'result', 'error' and 'seconds'.
+    """
+    timeout = INVENTORY_REGION_TIMEOUT if timeout is None else timeout
+    results = run_concurrently(func, regions, max_workers, timeout)
+    for result in results:
+        result['region'] = result.pop('item')
+    return results
+
+
+@cached_tool(ttl=60, tags=('ec2',), cache_if=_is_not_error)
+def get_ec2_inventory(regions=None, state=None, tag=None, instance_type=None, vpc_id=None,
+                      fields=None, max_results=10):
+    """
+    This function summarizes EC2 instances across many regions, queried in parallel.
+
+    Parameters
+    ----------
+    regions : str, optional
+        Comma-separated regions to query, or 'all' for every enabled region. Defaults to
+        the AWS_INVENTORY_REGIONS setting, or every enabled region if that is not set.
+    state : str, optional
+        Only include instances in these comma-separated states (e.g., 'running,stopped').
+    tag : str, optional
+        Only include instances with this tag, given as 'Key=Value' or just 'Key'.
+    instance_type : str, optional
+        Only include instances of these comma-separated types (e.g., 't2.micro').
+    vpc_id : str, optional
+        Only include instances in these comma-separated VPC IDs.
+    fields : str, optional
+        Comma-separated fields to show for listed instances (see get_ec2_info).
+    max_results : int, optional
+        Number of most recently launched instances to list across all regions (default 10).
+
+    Returns
+    -------
+    string
+        Instance counts by state and type across all regions, per-region timing and errors,
+        and the most recently launched instances.
+    """
+    try:
+        fields, error = _parse_fields(fields)
+        if error:
+            return error
+
+        regions = regions or INVENTORY_REGIONS
+        if not regions or str(regions).strip().lower() == 'all':
+            regions = list_enabled_regions()
+        else:
+            regions = _split_values(regions)
+
+        filters = build_ec2_filters(state, tag, instance_type, vpc_id)
+        max_results = int(max_results or 10)
+
+        def summarize_region(region):
+            ec2_client = get_client('ec2', region_name=region)
+            return _summarize_instances(iter_ec2_instances(ec2_client, filters, page_size=1000), max_results)
+
+        start = time.perf_counter()
+        region_results = run_in_regions(summarize_region, regions)
+        wall_time = time.perf_counter() - start
+
+        merged = _InstanceSummary(max_results)
+        region_lines = []
+        for r in region_results:
+            if r['error']:
+                region_lines.append(f"{r['region']}: error after {r['seconds']:.2f}s: {r['error']}")
+            else:
+                merged.merge(r['result'], label=r['region'])
+                region_lines.append(f"{r['region']}: {r['result'].total} instances in {r['seconds']:.2f}s")
+
+        failed = sum(1 for r in region_results if r['error'])
+        lines = [f"Regions queried: {len(regions)} ({len(regions) - failed} ok, {failed} failed), "
+                 f"wall time {wall_time:.2f}s"]
+        if merged.total:
+            lines.append(merged.format(fields))
+        else:
+            lines.append("No EC2 instances found in the queried regions.")
+        lines.append("Per region:")
+        lines.extend(region_lines)
+        return "\n".join(lines)
+
+    except Exception as e:
+        return f"An error occurred while retrieving the EC2 inventory: {str(e)}"
+
+
+def _spread(count, slots):
+    # Split `count` as evenly as possible over `slots`, dropping empty shares.
+    base, extra = divmod(count, len(slots))
+    return [(slot, base + (1 if i < extra else 0)) for i, slot in enumerate(slots) if base or i < extra]
+
+
+@invalidates('ec2')
+def launch_ec2_fleet(name_template, image_id, instance_type, key_pair, count, architecture=None,
+                     subnet_ids=None, wait=False, region=None):
+    """
+    Launch a fleet of identical EC2 instances with as few API calls as possible.
+
+    Parameters
+    ----------
+    name_template : str
+        Name for the instances. Use '{index}' for a per-instance number (e.g., 'web-{index}').
+    image_id : str
+        The Amazon Machine Image (AMI) ID.
+    instance_type : str
+        The type of the EC2 instances (e.g., 't2.micro').
+    key_pair : str
+        The name of the key pair to associate with the instances.
+    count : int
+        Number of instances to launch.
+    architecture : str, optional
+        The architecture of the instances (e.g., 'x86_64', 'arm64'), added as a tag.
+    subnet_ids : str, optional
+        Comma-separated subnet IDs to spread the instances across evenly, e.g. one per availability zone.
+    wait : bool, optional
+        If true, wait until every instance is running before returning.
+    region : str, optional
+        The AWS region to launch in. Defaults to AWS_DEFAULT_REGION or 'us-east-1'.
+
+    Returns
+    -------
+    dict
+        The launched instance IDs, the number launched per subnet, and any errors.
+    """
+    try:
+        count = int(count)
+        if count < 1:
+            return {"Error": "count must be at least 1."}
+
+        ec2_client = get_client('ec2', region_name=region or DEFAULT_REGION)
+        fleet_id = f"fleet-{uuid.uuid4().hex[:8]}"
+        per_instance_names = '{index}' in name_template
+
+        tags = [{'Key': 'Fleet', 'Value': fleet_id}]
+        if architecture:
+            tags.append({'Key': 'Architecture', 'Value': architecture})
+        if not per_instance_names:
+            tags.append({'Key': 'Name', 'Value': name_template})
+
+        progress.emit(f"Launching fleet {fleet_id} of {count} x {instance_type} instances from {image_id}",
+                      key=fleet_id)
+
+        # One run_instances call per subnet, or a single call when no subnets are given.
+        shares = _spread(count, _split_values(subnet_ids) if subnet_ids else [None])
+
+        def launch(share):
+            subnet_id, share_count = share
+            params = {
+                'ImageId': image_id,
+                'InstanceType': instance_type,
+                'MinCount': share_count,
+                'MaxCount': share_count,
+                'KeyName': key_pair,
+                'TagSpecifications': [{'ResourceType': 'instance', 'Tags': tags}],
+            }
+            if subnet_id:
+                params['SubnetId'] = subnet_id
+            response = ec2_client.run_instances(**params)
+            return [instance['InstanceId'] for instance in response['Instances']]
+
+        launched = run_concurrently(launch, shares, max_workers=len(shares))
+
+        instance_ids = []
+        by_subnet = {}
+        errors = []
+        for r in launched:
+            subnet_id, share_count = r['item']
+            label = subnet_id or 'default'
+            if r['error']:
+                errors.append(f"{label}: {r['error']}")
+                by_subnet[label] = 0
+            else:
+                instance_ids.extend(r['result'])
+                by_subnet[label] = len(r['result'])
+
+        # Distinct Name tags cannot share one create_tags call, so they are applied concurrently.
+        if per_instance_names and instance_ids:
+            def tag_instance(item):
+                index, instance_id = item
+                ec2_client.create_tags(
+                    Resources=[instance_id],
+                    Tags=[{'Key': 'Name', 'Value': name_template.replace('{index}', str(index))}],
+                )
+
+            tagged = run_concurrently(tag_instance, list(enumerate(instance_ids, start=1)))
+            errors.extend(f"tagging {r['item'][1]}: {r['error']}" for r in tagged if r['error'])
+
+        state = 'pending'
+        if str(wait).lower() in ('true', '1', 'yes') and instance_ids:
+            # The waiter polls describe_instances for the whole batch, not one call per instance.
+            waiter = ec2_client.get_waiter('instance_running')
+            progress.emit(f"Fleet {fleet_id}: waiting for {len(instance_ids)} instances to start running", key=fleet_id)
+            try:
+                for i in range(0, len(instance_ids), 1000):
+                    waiter.wait(InstanceIds=instance_ids[i:i + 1000])
+                state = 'running'
+            except WaiterError as e:
+                # The instances are launched either way; report them rather than only the error.
+                state = 'unknown'
+                errors.append(f"waiting for instances: {e}")
+
+        progress.emit(f"Fleet {fleet_id}: launched {len(instance_ids)} of {count} instances", key=fleet_id, done=True)
+
+        result = {
+            "FleetId": fleet_id,
+            "Requested": count,
+            "Launched": len(instance_ids),
+            "State": state,
+            "BySubnet": by_subnet,
+            "InstanceIds": instance_ids,
+        }
+        if errors:
+            result["Errors"] = errors
+        return result
+
+    except (NoCredentialsError, PartialCredentialsError):
+        return {"Error": "AWS credentials not found or incomplete!"}
+    except Exception as e:
+        return {"Error": str(e)}
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+@cached_tool(ttl=10, tags=('files',), cache_if=_is_not_error)
+def get_available_files_to_upload(prefix=None, extension=None, min_size_mb=None, max_size_mb=None,
+                                  page=1, page_size=FILE_LIST_PAGE_SIZE):
+    """
+    Lists the files available to upload, with their sizes, one page at a time.
+
+    Parameters
+    ----------
+    prefix : str, optional
+        Only files whose path starts with this (e.g., 'images/' or 'report').
+    extension : str, optional
+        Only files with this extension (e.g., 'jpg').
+    min_size_mb : float, optional
+        Only files at least this large, in MB.
+    max_size_mb : float, optional
+        Only files at most this large, in MB.
+    page : int, optional
+        The page of results to return, starting at 1.
+    page_size : int, optional
+        Files per page.
+
+    Returns
+    -------
+    str
+        How many files match in total, then one 'path (size)' line per file on the page,
+        or an error message.
+    """
+    try:
+        catalog = get_catalog(UPLOAD_DIR)
+        catalog.refresh()
+        page, page_size = max(1, int(page)), max(1, int(page_size))
+        total_count, total_bytes, files = catalog.query(
+            prefix=prefix,
+            extension=extension,
+            min_size=None if min_size_mb is None else float(min_size_mb) * s3_transfer.MB,
+            max_size=None if max_size_mb is None else float(max_size_mb) * s3_transfer.MB,
+            offset=(page - 1) * page_size,
+            limit=page_size,
+        )
+        if not total_count:
+            return f"No files in '{UPLOAD_DIR}' match."
+        if not files:
+            return f"Page {page} is past the end: {total_count} files match."
+
+        first = (page - 1) * page_size + 1
+        lines = [f"{total_count} files ({_format_size(total_bytes)}) match; "
+                 f"showing {first}-{first + len(files) - 1}:"]
+        lines += [f"{path} ({_format_size(size)})" for path, size in files]
+        if first + len(files) - 1 < total_count:
+            lines.append(f"Call again with page={page + 1} for more.")
+        return '\n'.join(lines)
     except Exception as e:
         return f"An error occurred while retrieving available files: {str(e)}"
 
 
-def upload_file_to_s3(file_name, bucket_name, object_name=None):
+@cached_tool(ttl=60, tags=('s3',), cache_if=_is_not_error)
+def list_s3_buckets():
+    """
+    Lists the S3 buckets in the current AWS account.
+
+    Returns
+    -------
+    str
+        The bucket names, one per line, or an error message.
+    """
+    try:
+        response = get_client('s3').list_buckets()
+        buckets = [bucket['Name'] for bucket in response['Buckets']]
+        if not buckets:
+            return "No S3 buckets found in the current AWS account."
+        return "\n".join(buckets)
+    except Exception as e:
+        return f"An error occurred while listing S3 buckets: {str(e)}"
+
+
+def ensure_bucket(s3_client, bucket_name):
+    """
+    Make sure an S3 bucket exists, creating it if needed.
+
+    Buckets seen once are remembered until an upload finds them deleted, so repeated
+    uploads to the same bucket cost no API calls. Otherwise a single
+    head_bucket call is made. Creation is idempotent: a concurrent creation of
+    the same bucket by this account (BucketAlreadyOwnedByYou) counts as
+    success. Outside us-east-1 the client's region is sent as LocationConstraint.
+
+    Parameters
+    ----------
+    s3_client : botocore.client.S3
+        The S3 client to use; its region is where a new bucket is created.
+    bucket_name : str
+        The bucket name.
+
+    Returns
+    -------
+    bool
+        True if the bucket was created by this call, False if it already existed.
+    """
+    if bucket_name in _known_buckets:
+        return False
+
+    with _bucket_lock:
+        lock = _bucket_locks.setdefault(bucket_name, threading.Lock())
+    with lock:
+        if bucket_name in _known_buckets:
+            return False
+
+        created = False
+        try:
+            s3_client.head_bucket(Bucket=bucket_name)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchBucket', 'NotFound'):
+                raise
+            region = s3_client.meta.region_name
+            params = {'Bucket': bucket_name}
+            if region and region != 'us-east-1':
+                params['CreateBucketConfiguration'] = {'LocationConstraint': region}
+            try:
+                s3_client.create_bucket(**params)
+                created = True
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'BucketAlreadyOwnedByYou':
+                    raise
+
+        _known_buckets.add(bucket_name)
+        return created
+
+
+def _is_missing_bucket(error):
+    # boto3's managed uploads wrap the ClientError in S3UploadFailedError, which keeps only its message.
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') == 'NoSuchBucket'
+    return 'NoSuchBucket' in str(error)
+
+
+def _upload_to_bucket(s3_client, bucket_name, upload):
+    """
+    Call `upload()` after making sure the bucket exists.
+
+    A bucket deleted since ensure_bucket last saw it makes the upload fail
+    with NoSuchBucket; it is then forgotten, checked (and recreated) again,
+    and the upload is retried once.
+    """
+    ensure_bucket(s3_client, bucket_name)
+    try:
+        return upload()
+    except Exception as e:
+        if not _is_missing_bucket(e):
+            raise
+    _known_buckets.discard(bucket_name)
+    ensure_bucket(s3_client, bucket_name)
+    return upload()
+
+
+@invalidates('s3')
+def upload_file_to_s3(file_name, bucket_name, object_name=None, chunk_size_mb=None, max_concurrency=None):
     """
     Uploads a file to an S3 bucket.
 
@@ -132,6 +870,10 @@ def upload_file_to_s3(file_name, bucket_name, object_name=None):
         The name of the S3 bucket to upload the file to.
     object_name : str, optional
         The name of the object in the S3 bucket to store the file as. If not provided, the file_name is used.
+    chunk_size_mb : int, optional
+        Multipart chunk size in MB for large files. Defaults to S3_MULTIPART_CHUNK_MB.
+    max_concurrency : int, optional
+        Number of parts uploaded in parallel. Defaults to S3_MAX_CONCURRENCY.
 
     Returns
     -------
@@ -149,24 +891,25 @@ def upload_file_to_s3(file_name, bucket_name, object_name=None):
     Exception
         If any other error occurs during upload.
     """
-    s3_client = boto3.client('s3')
+    s3_client = get_client('s3')
 
-    file_name = "./samplefiles/" + file_name
+    file_name = f"./{UPLOAD_DIR}/" + file_name
 
     # If the object name is not provided, use the file name
     if object_name is None:
         object_name = file_name
 
     try:
-        # Check if the bucket exists
-        response = s3_client.list_buckets()
-        existing_buckets = [bucket['Name'] for bucket in response['Buckets']]
-        if not bucket_name in existing_buckets:
-            # If the bucket does not exist, create it
-            s3_client.create_bucket(Bucket=bucket_name)
-        # Upload the file
-        s3_client.upload_file(file_name, bucket_name, object_name)
-        return (f"File '{file_name}' uploaded successfully to '{bucket_name}/{object_name}'")
+        # Upload the file; large files use a resumable parallel multipart upload
+        def upload():
+            callback = s3_transfer.UploadProgress(file_name, os.path.getsize(file_name))
+            return s3_transfer.upload_file(
+                s3_client, file_name, bucket_name, object_name, chunk_size_mb, max_concurrency, callback=callback
+            )
+
+        resumed_parts = _upload_to_bucket(s3_client, bucket_name, upload)
+        resumed = f" (resumed, {resumed_parts} parts already uploaded)" if resumed_parts else ""
+        return (f"File '{file_name}' uploaded successfully to '{bucket_name}/{object_name}'{resumed}")
     except FileNotFoundError:
         return (f"File '{file_name}' not found.")
     except NoCredentialsError:
@@ -176,13 +919,100 @@ def upload_file_to_s3(file_name, bucket_name, object_name=None):
     except Exception as e:
         return (f"Error occurred: {e}")
 
-# # Example usage
-file_name = "jaguar.webp"
-bucket_name = "com.visheshpandey.in"
-response = upload_file_to_s3(file_name, bucket_name)
-print(response)
+def _match_upload_files(pattern):
+    root = os.path.realpath(UPLOAD_DIR)
+    target = os.path.join(root, pattern)
+    if os.path.isdir(target):
+        matches = [os.path.join(dirpath, name) for dirpath, _, names in os.walk(target) for name in names]
+    else:
+        matches = [path for path in glob.glob(target, recursive=True) if os.path.isfile(path)]
+    # Never upload anything outside the upload directory, e.g. via '../'.
+    return sorted(path for path in matches if os.path.realpath(path).startswith(root + os.sep))
 
 
-# files = get_available_files_to_upload()
+def _upload_if_changed(s3_client, file_path, bucket_name, key, callback):
+    try:
+        head = s3_client.head_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+        head = None
+
+    size = os.path.getsize(file_path)
+    if head and head['ContentLength'] == size and head['ETag'] == get_catalog(UPLOAD_DIR).etag(file_path):
+        callback(size)
+        return 'skipped'
+
+    s3_transfer.upload_file(s3_client, file_path, bucket_name, key, callback=callback)
+    return 'uploaded'
+
+
+@invalidates('s3')
+def upload_files_to_s3(pattern, bucket_name, prefix=None, max_workers=None):
+    """
+    Uploads many files to an S3 bucket in one call.
+
+    Parameters
+    ----------
+    pattern : str
+        A directory or glob pattern relative to the upload folder (e.g., '*.jpg', 'images/**/*.png', '.').
+    bucket_name : str
+        The name of the S3 bucket to upload the files to.
+    prefix : str, optional
+        A key prefix for the uploaded objects (e.g., 'backups/'). Files keep their path relative
+        to the upload folder.
+    max_workers : int, optional
+        Number of files uploaded in parallel. Defaults to S3_BULK_UPLOAD_MAX_WORKERS.
+
+    Returns
+    -------
+    str
+        A summary of how many files were uploaded, skipped because they were unchanged, or failed.
+    """
+    try:
+        files = _match_upload_files(pattern)
+        if not files:
+            return f"No files in '{UPLOAD_DIR}' match '{pattern}'."
+
+        s3_client = get_client('s3')
+        ensure_bucket(s3_client, bucket_name)
+
+        root = os.path.realpath(UPLOAD_DIR)
+        prefix = prefix or ''
+        total_bytes = sum(os.path.getsize(path) for path in files)
+        callback = s3_transfer.UploadProgress(f"{len(files)} files", total_bytes)
+
+        def upload(path):
+            key = prefix + os.path.relpath(os.path.realpath(path), root).replace(os.sep, '/')
+            try:
+                status = _upload_to_bucket(
+                    s3_client, bucket_name, lambda: _upload_if_changed(s3_client, path, bucket_name, key, callback)
+                )
+                return path, status, None
+            except Exception as e:
+                return path, 'failed', str(e)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=int(max_workers or BULK_UPLOAD_MAX_WORKERS)) as executor:
+            results = list(executor.map(upload, files))
+        elapsed = time.perf_counter() - start
 
-# print(files)
\ No newline at end of file
+        counts = Counter(status for _, status, _ in results)
+        failures = [(path, error) for path, status, error in results if status == 'failed']
+        lines = [
+            f"Uploaded {counts['uploaded']}, skipped {counts['skipped']} unchanged, failed {counts['failed']} "
+            f"of {len(files)} files ({total_bytes / s3_transfer.MB:.1f} MB) to '{bucket_name}/{prefix}' "
+            f"in {elapsed:.1f}s."
+        ]
+        for path, error in failures[:10]:
+            lines.append(f"Failed: {os.path.relpath(path, root)}: {error}")
+        if len(failures) > 10:
+            lines.append(f"... and {len(failures) - 10} more failures.")
+        return "\n".join(lines)
+
+    except NoCredentialsError:
+        return ("Credentials not available.")
+    except PartialCredentialsError:
+        return ("Incomplete credentials provided.")
+    except Exception as e:
+        return (f"Error occurred: {e}")
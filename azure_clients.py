@@ -0,0 +1,138 @@
+import atexit
+import importlib
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from api_scheduler import azure_client_options
+from tracing import azure_client_hooks
+
+
+_lock = threading.RLock()
+_env_loaded = False
+_credential = None
+_clients = {}
+
+# The Azure SDKs take seconds to import, so client classes are imported on first use.
+_CLIENT_CLASSES = {
+    "resource": ("azure.mgmt.resource", "ResourceManagementClient"),
+    "network": ("azure.mgmt.network", "NetworkManagementClient"),
+    "compute": ("azure.mgmt.compute", "ComputeManagementClient"),
+}
+
+
+def _load_env():
+    global _env_loaded
+
+    if not _env_loaded:
+        with _lock:
+            if not _env_loaded:
+                load_dotenv()  # Load environment variables
+                _env_loaded = True
+
+
+def get_subscription_id():
+    """
+    Return the subscription ID from AZURE_SUBSCRIPTION_ID.
+
+    Raises
+    ------
+    ValueError
+        If AZURE_SUBSCRIPTION_ID is not set.
+    """
+    _load_env()
+    subscription_id = os.environ.get("AZURE_SUBSCRIPTION_ID")
+    if not subscription_id:
+        raise ValueError("AZURE_SUBSCRIPTION_ID environment variable is not set.")
+    return subscription_id
+
+
+def get_credential():
+    """
+    Return the shared DefaultAzureCredential.
+
+    The credential probes its sources once and keeps its token cache, so
+    later tool calls reuse the access token until it expires.
+    """
+    global _credential
+
+    _load_env()
+    if _credential is None:
+        with _lock:
+            if _credential is None:
+                from azure.identity import DefaultAzureCredential
+
+                _credential = DefaultAzureCredential()
+    return _credential
+
+
+def get_client(kind, subscription_id=None):
+    """
+    Return a management client memoized per (kind, subscription).
+
+    Parameters
+    ----------
+    kind : str
+        One of 'resource', 'network' or 'compute'.
+    subscription_id : str, optional
+        The subscription to manage. Defaults to AZURE_SUBSCRIPTION_ID.
+
+    Returns
+    -------
+    object
+        The cached ResourceManagementClient, NetworkManagementClient or ComputeManagementClient.
+    """
+    subscription_id = subscription_id or get_subscription_id()
+    key = (kind, subscription_id)
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            # Every HTTP request, including long-running operation polls, is rate-limited, retried on
+            # throttling and transient errors, and recorded as a trace span.
+            module_name, class_name = _CLIENT_CLASSES[kind]
+            client_class = getattr(importlib.import_module(module_name), class_name)
+            client = client_class(get_credential(), subscription_id, **azure_client_options(**azure_client_hooks()))
+            _clients[key] = client
+        return client
+
+
+def get_resource_client(subscription_id=None):
+    return get_client("resource", subscription_id)
+
+
+def get_network_client(subscription_id=None):
+    return get_client("network", subscription_id)
+
+
+def get_compute_client(subscription_id=None):
+    return get_client("compute", subscription_id)
+
+
+def close_clients():
+    """Close every cached management client and the shared credential."""
+    global _credential
+
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        credential, _credential = _credential, None
+
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+    if credential is not None:
+        try:
+            credential.close()
+        except Exception:
+            pass
+
+
+atexit.register(close_clients)
@@ -1,15 +1,303 @@
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.resource import ResourceManagementClient
-from dotenv import load_dotenv
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import ipaddress
 import os
+import threading
+import time
 
+from azure_clients import get_compute_client, get_network_client, get_resource_client, get_subscription_id
+import progress
+from provisioning import Step, format_timings, run_steps
+from resource_state import fingerprint, get_state
+from tool_cache import invalidates
+from tracing import span
 
+
+# VMs provisioned at once by deploy_azure_vms.
+BULK_DEPLOY_MAX_WORKERS = int(os.environ.get("AZURE_BULK_DEPLOY_MAX_WORKERS", "4"))
+# New VNets created by deploy_azure_vms each get a free /16 from this range.
+VNET_ADDRESS_POOL = os.environ.get("AZURE_VNET_ADDRESS_POOL", "10.0.0.0/8")
+
+# Azure keeps five addresses of every subnet for itself.
+RESERVED_SUBNET_ADDRESSES = 5
+
+# Prefixes handed out by this process, so concurrent deployments never pick the same one.
+_allocated_prefixes = set()
+_allocation_lock = threading.Lock()
+
+
+# Provisioning steps shared by the tools below. Each waits for its operation and returns the resource.
+
+def _provision(label, path, spec, get, create):
+    """
+    Return the resource at `path`, calling `create()` unless it is already provisioned as `spec`.
+
+    The resource counts as provisioned when the resource state index holds
+    the fingerprint of the same spec for it and a GET finds it in the
+    Succeeded state. Otherwise `create()` runs (a create-or-update, so it
+    also applies a changed spec) and the spec is recorded.
+    """
+    state = get_state()
+    if state is None:
+        return create()
+
+    from azure.core.exceptions import ResourceNotFoundError
+
+    key = f"azure/{get_subscription_id()}/resourceGroups/{path}"
+    spec_fingerprint = fingerprint(spec)
+    entry = state.get(key)
+    if entry is not None and entry["fingerprint"] == spec_fingerprint:
+        try:
+            resource = get()
+        except ResourceNotFoundError:
+            resource = None
+        if resource is not None:
+            # Resource groups keep their provisioning state under `properties`.
+            provisioning_state = getattr(resource, "provisioning_state", None) or getattr(
+                getattr(resource, "properties", None), "provisioning_state", None)
+            if provisioning_state in (None, "Succeeded"):
+                progress.emit(f"{label} is already provisioned", key=label, done=True)
+                return resource
+    resource = create()
+    state.record(key, spec_fingerprint, resource.id)
+    return resource
+
+
+def _create_resource_group(resource_group_name, location):
+    parameters = {"location": location}
+    resource_client = get_resource_client()
+
+    def create():
+        rg_result = resource_client.resource_groups.create_or_update(resource_group_name, parameters)
+        progress.emit(f"Provisioned resource group {rg_result.name} in the {rg_result.location} region")
+        return rg_result
+
+    return _provision(f"Resource group {resource_group_name}", resource_group_name, parameters,
+                      lambda: resource_client.resource_groups.get(resource_group_name), create)
+
+
+def _create_vnet(resource_group_name, location, vnet_name, address_prefix):
+    parameters = {
+        "location": location,
+        "address_space": {"address_prefixes": [address_prefix]},
+    }
+    network_client = get_network_client()
+    label = f"Virtual network {vnet_name}"
+
+    def create():
+        poller = network_client.virtual_networks.begin_create_or_update(resource_group_name, vnet_name, parameters)
+        vnet_result = progress.wait_for(poller, label)
+        progress.emit(f"Provisioned virtual network {vnet_result.name}", key=label, done=True)
+        return vnet_result
+
+    return _provision(label, f"{resource_group_name}/virtualNetworks/{vnet_name}", parameters,
+                      lambda: network_client.virtual_networks.get(resource_group_name, vnet_name), create)
+
+
+def _create_subnet(resource_group_name, vnet_name, subnet_name, address_prefix):
+    parameters = {"address_prefix": address_prefix}
+    network_client = get_network_client()
+    label = f"Subnet {subnet_name}"
+
+    def create():
+        poller = network_client.subnets.begin_create_or_update(
+            resource_group_name, vnet_name, subnet_name, parameters
+        )
+        subnet_result = progress.wait_for(poller, label)
+        progress.emit(f"Provisioned subnet {subnet_result.name} in virtual network {vnet_name}", key=label, done=True)
+        return subnet_result
+
+    return _provision(label, f"{resource_group_name}/virtualNetworks/{vnet_name}/subnets/{subnet_name}", parameters,
+                      lambda: network_client.subnets.get(resource_group_name, vnet_name, subnet_name), create)
+
+
+def _create_public_ip(resource_group_name, location, ip_name):
+    parameters = {
+        "location": location,
+        "sku": {"name": "Standard"},
+        "public_ip_allocation_method": "Static",
+        "public_ip_address_version": "IPV4",
+    }
+    network_client = get_network_client()
+    label = f"Public IP address {ip_name}"
+
+    def create():
+        poller = network_client.public_ip_addresses.begin_create_or_update(resource_group_name, ip_name, parameters)
+        ip_address_result = progress.wait_for(poller, label)
+        progress.emit(f"Provisioned public IP address {ip_address_result.name}", key=label, done=True)
+        return ip_address_result
+
+    return _provision(label, f"{resource_group_name}/publicIPAddresses/{ip_name}", parameters,
+                      lambda: network_client.public_ip_addresses.get(resource_group_name, ip_name), create)
+
+
+def _create_nic(resource_group_name, location, nic_name, ip_config_name, subnet_id, public_ip_id):
+    parameters = {
+        "location": location,
+        "ip_configurations": [
+            {
+                "name": ip_config_name,
+                "subnet": {"id": subnet_id},
+                "public_ip_address": {"id": public_ip_id},
+            }
+        ],
+    }
+    network_client = get_network_client()
+    label = f"Network interface {nic_name}"
+
+    def create():
+        poller = network_client.network_interfaces.begin_create_or_update(resource_group_name, nic_name, parameters)
+        nic_result = progress.wait_for(poller, label)
+        progress.emit(f"Provisioned network interface {nic_result.name}", key=label, done=True)
+        return nic_result
+
+    return _provision(label, f"{resource_group_name}/networkInterfaces/{nic_name}", parameters,
+                      lambda: network_client.network_interfaces.get(resource_group_name, nic_name), create)
+
+
+def _create_vm(resource_group_name, location, vm_name, username, password, nic_id):
+    parameters = {
+        "location": location,
+        "storage_profile": {
+            "image_reference": {
+                "publisher": "Canonical",
+                "offer": "UbuntuServer",
+                "sku": "16.04.0-LTS",
+                "version": "latest",
+            }
+        },
+        "hardware_profile": {"vm_size": "Standard_DS1_v2"},
+        "os_profile": {
+            "computer_name": vm_name,
+            "admin_username": username,
+            "admin_password": password,
+        },
+        "network_profile": {
+            "network_interfaces": [
+                {
+                    "id": nic_id,
+                }
+            ]
+        },
+    }
+    compute_client = get_compute_client()
+    label = f"Virtual machine {vm_name}"
+
+    def create():
+        poller = compute_client.virtual_machines.begin_create_or_update(resource_group_name, vm_name, parameters)
+        vm_result = progress.wait_for(poller, label)
+        progress.emit(f"Provisioned virtual machine {vm_result.name}", key=label, done=True)
+        return vm_result
+
+    # The password stays out of the index; Azure does not change it on an existing VM anyway.
+    spec = dict(parameters, os_profile=dict(parameters["os_profile"], admin_password=None))
+    return _provision(label, f"{resource_group_name}/virtualMachines/{vm_name}", spec,
+                      lambda: compute_client.virtual_machines.get(resource_group_name, vm_name), create)
+
+
+# Address allocation
+
+def allocate_prefix(spaces, taken, prefixlen):
+    """
+    Return the first network of size `prefixlen` inside `spaces` that overlaps none of `taken`.
+
+    Prefixes already handed out by this process count as taken too, except
+    those containing the space allocated from (a VNet's own range when a
+    subnet is allocated in it), and the returned prefix is reserved.
+
+    Parameters:
+        spaces (list): CIDR ranges to allocate from (e.g., a VNet's address prefixes).
+        taken (list): CIDR prefixes already in use.
+        prefixlen (int): Prefix length of the network to allocate (e.g., 24).
+
+    Returns:
+        str: The allocated prefix (e.g., '10.3.0.0/16'), or None if every candidate overlaps.
+    """
+    with _allocation_lock:
+        allocated = [ipaddress.ip_network(p) for p in _allocated_prefixes]
+        for space in spaces:
+            space = ipaddress.ip_network(space, strict=False)
+            if space.prefixlen > prefixlen:
+                continue
+            used = [ipaddress.ip_network(p, strict=False) for p in taken]
+            used += [a for a in allocated if a.version == space.version and not a.supernet_of(space)]
+            for candidate in space.subnets(new_prefix=prefixlen):
+                if not any(candidate.overlaps(u) for u in used):
+                    _allocated_prefixes.add(str(candidate))
+                    return str(candidate)
+    return None
+
+
+def release_prefix(prefix):
+    """Return a prefix reserved by `allocate_prefix` whose network was never created."""
+    with _allocation_lock:
+        _allocated_prefixes.discard(prefix)
+
+
+def subnet_prefixlen(vm_count):
+    """The prefix length of the smallest subnet, at least a /24, with room for `vm_count` VMs."""
+    prefixlen = 24
+    while 2 ** (32 - prefixlen) - RESERVED_SUBNET_ADDRESSES < vm_count:
+        prefixlen -= 1
+    return prefixlen
+
+
+def _ensure_vnet(resource_group_name, location, vnet_name):
+    # Reuse the VNet if it exists; otherwise create it with a /16 no other VNet in the subscription uses.
+    from azure.core.exceptions import ResourceNotFoundError
+
+    network_client = get_network_client()
+    try:
+        vnet = network_client.virtual_networks.get(resource_group_name, vnet_name)
+        progress.emit(f"Reusing virtual network {vnet.name} ({', '.join(vnet.address_space.address_prefixes)})")
+        return vnet
+    except ResourceNotFoundError:
+        pass
+
+    taken = [prefix for other in network_client.virtual_networks.list_all() if other.address_space
+             for prefix in other.address_space.address_prefixes or []]
+    address_prefix = allocate_prefix([VNET_ADDRESS_POOL], taken, 16)
+    if address_prefix is None:
+        raise RuntimeError(f"No free /16 left in {VNET_ADDRESS_POOL} for virtual network {vnet_name}.")
+    try:
+        return _create_vnet(resource_group_name, location, vnet_name, address_prefix)
+    except Exception:
+        release_prefix(address_prefix)
+        raise
+
+
+def _ensure_subnet(resource_group_name, vnet, subnet_name, vm_count):
+    # Reuse the subnet if it has room for every VM; otherwise create one that does not overlap its siblings.
+    subnets = {subnet.name: subnet for subnet in vnet.subnets or []}
+    subnet = subnets.get(subnet_name)
+    if subnet is not None:
+        size = ipaddress.ip_network(subnet.address_prefix).num_addresses
+        free = size - RESERVED_SUBNET_ADDRESSES - len(subnet.ip_configurations or [])
+        if free < vm_count:
+            raise RuntimeError(f"Subnet {subnet_name} ({subnet.address_prefix}) has room for {free} more VMs, "
+                               f"not {vm_count}.")
+        progress.emit(f"Reusing subnet {subnet_name} ({subnet.address_prefix}, {free} free addresses)")
+        return subnet
+
+    taken = [s.address_prefix for s in subnets.values() if s.address_prefix]
+    address_prefix = allocate_prefix(vnet.address_space.address_prefixes, taken, subnet_prefixlen(vm_count))
+    if address_prefix is None:
+        raise RuntimeError(f"Virtual network {vnet.name} has no free range for {vm_count} more VMs.")
+    try:
+        return _create_subnet(resource_group_name, vnet.name, subnet_name, address_prefix)
+    except Exception:
+        release_prefix(address_prefix)
+        raise
+
+
+@invalidates('azure')
 def create_azure_vnet(resource_group_name, location, vnet_name,  subnet_name="mySubnet"):
     """
     Function to create a Virtual Network (VNet) in Azure.
 
+    A VNet or subnet already created with the same settings is left as it is.
+
     Parameters:
         resource_group_name (str): Name of the resource group.
         location (str): Azure region for the resources.
@@ -19,38 +307,12 @@ def create_azure_vnet(resource_group_name, location, vnet_name,  subnet_name="my
         subnet_prefix (str): Address prefix for the subnet.
     """
     try:
-        load_dotenv()  # Load environment variables
-        credential = DefaultAzureCredential()
-        subscription_id = os.environ.get("AZURE_SUBSCRIPTION_ID")
-        
-        if not subscription_id:
-            raise ValueError("AZURE_SUBSCRIPTION_ID environment variable is not set.")
-        
-        # Initialize the Network Management Client
-        network_client = NetworkManagementClient(credential, subscription_id)
-        
         # Step 1: Create the Virtual Network (VNet)
-        poller = network_client.virtual_networks.begin_create_or_update(
-            resource_group_name,
-            vnet_name,
-            {
-                "location": location,
-                "address_space": {"address_prefixes": ["10.0.0.0/16"]},
-            },
-        )
-        vnet_result = poller.result()
-        print(f"Provisioned virtual network {vnet_result.name}")
-        
+        vnet_result = _create_vnet(resource_group_name, location, vnet_name, "10.0.0.0/16")
+
         # Step 2: Create a Subnet within the VNet
-        poller = network_client.subnets.begin_create_or_update(
-            resource_group_name,
-            vnet_name,
-            subnet_name,
-            {"address_prefix": "10.0.1.0/24"},
-        )
-        subnet_result = poller.result()
-        print(f"Provisioned subnet {subnet_result.name} in virtual network {vnet_name}")
-        
+        subnet_result = _create_subnet(resource_group_name, vnet_name, subnet_name, "10.0.1.0/24")
+
         return {
             "vnet_id": vnet_result.id,
             "subnet_id": subnet_result.id,
@@ -58,12 +320,17 @@ def create_azure_vnet(resource_group_name, location, vnet_name,  subnet_name="my
 
     except Exception as e:
         return "There was some error while creating the azure vent. The error is : " + str(e)
-    
 
+
+@invalidates('azure')
 def deploy_azure_vm(resource_group_name, location, vm_name, username, password):
     """
     Function to deploy an Azure VM.
 
+    Independent provisioning steps run in parallel: the public IP is created
+    while the VNet and subnet are provisioned. Re-running a deploy skips the
+    resources it already created, so a failed deploy resumes where it stopped.
+
     Parameters:
         resource_group_name (str): Name of the resource group.
         location (str): Azure region for the resources.
@@ -73,123 +340,131 @@ def deploy_azure_vm(resource_group_name, location, vm_name, username, password):
     """
 
     try:
-        load_dotenv()  # Load environment variables
-        credential = DefaultAzureCredential()
-        subscription_id = os.environ.get("AZURE_SUBSCRIPTION_ID")
-        
-        if not subscription_id:
-            raise ValueError("AZURE_SUBSCRIPTION_ID environment variable is not set.")
-        
-        # Step 1: Provision a resource group
-        resource_client = ResourceManagementClient(credential, subscription_id)
-        rg_result = resource_client.resource_groups.create_or_update(
-            resource_group_name, {"location": location}
-        )
-        
-        print(f"Provisioned resource group {rg_result.name} in the {rg_result.location} region")
-        
-        # Step 2: Provision a virtual network
-        network_client = NetworkManagementClient(credential, subscription_id)
         vnet_name = f"{vm_name}-vnet"
         subnet_name = f"{vm_name}-subnet"
         ip_name = f"{vm_name}-ip"
         nic_name = f"{vm_name}-nic"
         ip_config_name = f"{vm_name}-ip-config"
-        
-        poller = network_client.virtual_networks.begin_create_or_update(
-            resource_group_name,
-            vnet_name,
-            {
-                "location": location,
-                "address_space": {"address_prefixes": ["10.0.0.0/16"]},
-            },
-        )
-        vnet_result = poller.result()
-        
-        print(f"Provisioned virtual network {vnet_result.name}")
-        
-        # Step 3: Provision a subnet
-        poller = network_client.subnets.begin_create_or_update(
-            resource_group_name,
-            vnet_name,
-            subnet_name,
-            {"address_prefix": "10.0.0.0/24"},
-        )
-        subnet_result = poller.result()
-        
-        print(f"Provisioned subnet {subnet_result.name}")
-        
-        # Step 4: Provision a public IP address
-        poller = network_client.public_ip_addresses.begin_create_or_update(
-            resource_group_name,
-            ip_name,
-            {
-                "location": location,
-                "sku": {"name": "Standard"},
-                "public_ip_allocation_method": "Static",
-                "public_ip_address_version": "IPV4",
-            },
-        )
-        ip_address_result = poller.result()
-        
-        print(f"Provisioned public IP address {ip_address_result.name}")
-        
-        # Step 5: Provision a network interface
-        poller = network_client.network_interfaces.begin_create_or_update(
-            resource_group_name,
-            nic_name,
-            {
-                "location": location,
-                "ip_configurations": [
-                    {
-                        "name": ip_config_name,
-                        "subnet": {"id": subnet_result.id},
-                        "public_ip_address": {"id": ip_address_result.id},
-                    }
-                ],
-            },
-        )
-        nic_result = poller.result()
-        
-        print(f"Provisioned network interface {nic_result.name}")
-        
-        # Step 6: Provision the virtual machine
-        compute_client = ComputeManagementClient(credential, subscription_id)
-        
-        poller = compute_client.virtual_machines.begin_create_or_update(
-            resource_group_name,
-            vm_name,
-            {
-                "location": location,
-                "storage_profile": {
-                    "image_reference": {
-                        "publisher": "Canonical",
-                        "offer": "UbuntuServer",
-                        "sku": "16.04.0-LTS",
-                        "version": "latest",
-                    }
-                },
-                "hardware_profile": {"vm_size": "Standard_DS1_v2"},
-                "os_profile": {
-                    "computer_name": vm_name,
-                    "admin_username": username,
-                    "admin_password": password,
-                },
-                "network_profile": {
-                    "network_interfaces": [
-                        {
-                            "id": nic_result.id,
-                        }
-                    ]
-                },
-            },
-        )
-        
-        vm_result = poller.result()
-        print(f"Provisioned virtual machine {vm_result.name}")
-        
-        return f"Provisioned virtual machine {vm_result.name} successfully"
+
+        # The public IP only needs the resource group, so it runs alongside the VNet -> subnet chain.
+        steps = [
+            Step("resource_group", [], lambda _: _create_resource_group(resource_group_name, location)),
+            Step("vnet", ["resource_group"],
+                 lambda _: _create_vnet(resource_group_name, location, vnet_name, "10.0.0.0/16")),
+            Step("subnet", ["vnet"],
+                 lambda _: _create_subnet(resource_group_name, vnet_name, subnet_name, "10.0.0.0/24")),
+            Step("public_ip", ["resource_group"], lambda _: _create_public_ip(resource_group_name, location, ip_name)),
+            Step("nic", ["subnet", "public_ip"],
+                 lambda inputs: _create_nic(resource_group_name, location, nic_name, ip_config_name,
+                                            inputs["subnet"].id, inputs["public_ip"].id)),
+            Step("vm", ["nic"],
+                 lambda inputs: _create_vm(resource_group_name, location, vm_name, username, password,
+                                           inputs["nic"].id)),
+        ]
+
+        start = time.perf_counter()
+        results, timings = run_steps(steps)
+        wall_time = time.perf_counter() - start
+
+        return (f"Provisioned virtual machine {results['vm'].name} successfully "
+                f"in {format_timings(timings, wall_time)}")
 
     except Exception as e:
         return str(e)
 
+
+@invalidates('azure')
+def deploy_azure_vms(resource_group_name, location, name_template, count, username, password,
+                     vnet_name=None, subnet_name=None, max_workers=None):
+    """
+    Function to deploy several Azure VMs that share one resource group, VNet and subnet.
+
+    The resource group, VNet and subnet are created once, or reused if they
+    already exist. A new VNet gets a /16 that overlaps no other VNet in the
+    subscription, and a new subnet gets a free range of the VNet sized for
+    every VM. Each VM's public IP, network interface and VM are then created,
+    several VMs at a time; a failed VM does not stop the others.
+
+    Parameters:
+        resource_group_name (str): Name of the resource group.
+        location (str): Azure region for the resources.
+        name_template (str): Name for the VMs. Use '{index}' for a per-VM number (e.g., 'web-{index}').
+        count (int): Number of VMs to deploy.
+        username (str): Admin username for the VMs.
+        password (str): Admin password for the VMs.
+        vnet_name (str, optional): Virtual network to use or create. Defaults to '<resource group>-vnet'.
+        subnet_name (str, optional): Subnet to use or create. Defaults to 'default'.
+        max_workers (int, optional): VMs provisioned at once. Defaults to AZURE_BULK_DEPLOY_MAX_WORKERS.
+
+    Returns:
+        dict: The shared network, then per VM its status, public and private IP, time taken and any error.
+    """
+    try:
+        count = int(count)
+        if count < 1:
+            return {"Error": "count must be at least 1."}
+        if '{index}' not in name_template:
+            name_template += '-{index}'
+        vm_names = [name_template.replace('{index}', str(index)) for index in range(1, count + 1)]
+        vnet_name = vnet_name or f"{resource_group_name}-vnet"
+        subnet_name = subnet_name or "default"
+
+        start = time.perf_counter()
+        with span("network", kind="step"):
+            _create_resource_group(resource_group_name, location)
+            vnet = _ensure_vnet(resource_group_name, location, vnet_name)
+            subnet = _ensure_subnet(resource_group_name, vnet, subnet_name, count)
+        network_time = time.perf_counter() - start
+
+        def deploy_one(vm_name):
+            steps = [
+                Step("public_ip", [], lambda _: _create_public_ip(resource_group_name, location, f"{vm_name}-ip")),
+                Step("nic", ["public_ip"],
+                     lambda inputs: _create_nic(resource_group_name, location, f"{vm_name}-nic",
+                                                f"{vm_name}-ip-config", subnet.id, inputs["public_ip"].id)),
+                Step("vm", ["nic"],
+                     lambda inputs: _create_vm(resource_group_name, location, vm_name, username, password,
+                                               inputs["nic"].id)),
+            ]
+            vm_start = time.perf_counter()
+            summary = {"Name": vm_name}
+            try:
+                with span(vm_name, kind="vm"):
+                    results, _ = run_steps(steps, max_workers=1)
+                summary["Status"] = "succeeded"
+                summary["PublicIp"] = getattr(results["public_ip"], "ip_address", None)
+                ip_configurations = getattr(results["nic"], "ip_configurations", None) or []
+                if ip_configurations:
+                    summary["PrivateIp"] = ip_configurations[0].private_ip_address
+            except Exception as e:
+                summary["Status"] = "failed"
+                summary["Error"] = str(e)
+            summary["Seconds"] = round(time.perf_counter() - vm_start, 1)
+            with finished_lock:
+                finished[summary["Status"]] += 1
+                done = sum(finished.values())
+                progress.emit(f"Deployed {finished['succeeded']} of {count} VMs ({finished['failed']} failed)",
+                              key=f"VMs in {resource_group_name}", done=done == count)
+            return summary
+
+        finished = Counter()
+        finished_lock = threading.Lock()
+
+        # Each VM runs in a copy of this context so its spans and progress belong to this call.
+        with ThreadPoolExecutor(max_workers=int(max_workers or BULK_DEPLOY_MAX_WORKERS)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, deploy_one, name) for name in vm_names]
+            vms = [future.result() for future in futures]
+        wall_time = time.perf_counter() - start
+
+        return {
+            "ResourceGroup": resource_group_name,
+            "VirtualNetwork": f"{vnet.name} ({', '.join(vnet.address_space.address_prefixes)})",
+            "Subnet": f"{subnet.name} ({subnet.address_prefix})",
+            "Requested": count,
+            "Deployed": sum(vm["Status"] == "succeeded" for vm in vms),
+            "Timing": f"total {wall_time:.1f}s (shared network {network_time:.1f}s)",
+            "VMs": vms,
+        }
+
+    except Exception as e:
+        return str(e)
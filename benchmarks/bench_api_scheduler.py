@@ -0,0 +1,103 @@
+"""
+Bulk EC2 calls against a stub endpoint with EC2's request token bucket (by
+default a burst of 100 and 20 requests per second) that answers
+RequestLimitExceeded when it is empty. Compares a plain boto3 client using
+botocore's default retries with a pooled client whose calls go through
+api_scheduler: how many calls succeed, how fast, and how many requests the
+server had to reject.
+
+Usage: python benchmarks/bench_api_scheduler.py [--calls N] [--workers N] [--rate R] [--burst B]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3
+
+import api_scheduler
+from aws_clients import get_client
+from stub_endpoint import EMPTY_DESCRIBE_INSTANCES, StubEndpoint
+
+THROTTLED = (
+    "<Response><Errors><Error><Code>RequestLimitExceeded</Code>"
+    "<Message>Request limit exceeded.</Message></Error></Errors><RequestID>stub</RequestID></Response>"
+)
+
+
+class ServerLimit:
+    """The stub's own token bucket: `rate` requests per second with a burst of `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.accepted = self.throttled = 0
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.accepted += 1
+                return True
+            self.throttled += 1
+            return False
+
+
+def run(label, client, calls, workers, limit):
+    def call(_):
+        try:
+            client.describe_instances()
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        ok = sum(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {ok}/{calls} succeeded in {elapsed:5.2f}s ({ok / elapsed:5.1f} calls/s), "
+          f"{limit.accepted + limit.throttled} requests sent, {limit.throttled} throttled by the server")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=20, help="requests per second the stub accepts")
+    parser.add_argument("--burst", type=float, default=100, help="requests the stub accepts at once")
+    args = parser.parse_args()
+
+    for label in ("botocore default retries", "api_scheduler"):
+        limit = ServerLimit(args.rate, args.burst)
+
+        def responder(method, path, params, body):
+            if limit.allow():
+                return 200, EMPTY_DESCRIBE_INSTANCES, {}
+            return 503, THROTTLED, {}
+
+        with StubEndpoint(responder) as endpoint:
+            if label == "api_scheduler":
+                os.environ["AWS_ENDPOINT_URL"] = endpoint.url
+                client = get_client("ec2", "us-east-1")
+            else:
+                client = boto3.client("ec2", region_name="us-east-1", endpoint_url=endpoint.url)
+            run(label, client, args.calls, args.workers, limit)
+
+    print(api_scheduler.format_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-call latency of creating a boto3 client on every tool call versus reusing
+the pooled client from `aws_clients`, measured against a local stub endpoint.
+
+Usage: python benchmarks/bench_aws_clients.py [--calls N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3
+
+import aws_clients
+from stub_endpoint import StubEndpoint
+
+
+def measure(make_client, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        make_client().describe_instances()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} mean {statistics.mean(timings):8.2f} ms   "
+          f"p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    with StubEndpoint() as endpoint:
+        # botocore honours AWS_ENDPOINT_URL, so both sides talk to the stub.
+        os.environ["AWS_ENDPOINT_URL"] = endpoint.url
+
+        def fresh_client():
+            return boto3.client("ec2", region_name="us-east-1")
+
+        def pooled_client():
+            return aws_clients.get_client("ec2", region_name="us-east-1")
+
+        # Warm up botocore's loader caches so both sides start from the same state.
+        fresh_client().describe_instances()
+
+        report("boto3.client per call", measure(fresh_client, args.calls))
+        report("pooled aws_clients", measure(pooled_client, args.calls))
+        print(f"stub endpoint served {endpoint.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Deploying N Azure VMs with N deploy_azure_vm calls (a VNet, subnet, public IP,
+NIC and VM each, one VM after another) versus one deploy_azure_vms call (a
+shared VNet and subnet, per-VM resources in parallel), against fake Azure
+clients whose long-running operations take a fixed time.
+
+Usage: python benchmarks/bench_azure_bulk_deploy.py [--vms N] [--azure-delay S] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ["AZURE_SUBSCRIPTION_ID"] = "bench-subscription"
+# Every run provisions from scratch; bench_resource_state.py measures the resource state index.
+os.environ["RESOURCE_STATE_ENABLED"] = "false"
+
+from azure_tools import deploy_azure_vm, deploy_azure_vms
+from bench_conversations import install_fake_azure
+import progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vms", type=int, default=8)
+    parser.add_argument("--azure-delay", type=float, default=0.2, help="seconds per fake long-running operation")
+    parser.add_argument("--workers", type=int, default=4, help="deploy_azure_vms parallelism")
+    args = parser.parse_args()
+    progress.PROGRESS_POLL_SECONDS = args.azure_delay / 4
+
+    install_fake_azure(args.azure_delay)
+    start = time.perf_counter()
+    for index in range(1, args.vms + 1):
+        deploy_azure_vm("bench-rg", "eastus", f"single-{index}", "azureuser", "Bench-Passw0rd!")
+    sequential = time.perf_counter() - start
+    print(f"{args.vms} x deploy_azure_vm   {sequential:6.2f}s, {args.vms} VNets and {args.vms} subnets, "
+          f"all 10.0.0.0/16")
+
+    install_fake_azure(args.azure_delay)
+    start = time.perf_counter()
+    result = deploy_azure_vms("bench-rg", "eastus", "bulk-{index}", args.vms, "azureuser", "Bench-Passw0rd!",
+                              max_workers=args.workers)
+    bulk = time.perf_counter() - start
+    print(f"deploy_azure_vms ({args.workers} at once) {bulk:6.2f}s, {result['Deployed']}/{args.vms} deployed, "
+          f"1 VNet {result['VirtualNetwork']}, 1 subnet {result['Subnet']}")
+
+    # A second batch reuses the VNet and gets its own, non-overlapping subnet.
+    result = deploy_azure_vms("bench-rg", "eastus", "more-{index}", 2, "azureuser", "Bench-Passw0rd!",
+                              subnet_name="second")
+    print(f"second batch in the same VNet: subnet {result['Subnet']}")
+
+
+if __name__ == "__main__":
+    main()
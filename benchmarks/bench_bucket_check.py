@@ -0,0 +1,88 @@
+"""
+Cost of the per-upload bucket existence check: scanning list_buckets() versus
+aws_tools.ensure_bucket (head_bucket plus a process-wide cache), against a
+local stub S3 endpoint holding thousands of buckets.
+
+Usage: python benchmarks/bench_bucket_check.py [--buckets N] [--calls N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3
+from botocore.config import Config
+
+import aws_tools
+from stub_endpoint import StubEndpoint
+
+
+def list_buckets_xml(count):
+    buckets = "".join(
+        f"<Bucket><Name>bucket-{i:05d}</Name><CreationDate>2024-01-01T00:00:00.000Z</CreationDate></Bucket>"
+        for i in range(count)
+    )
+    return (
+        '<ListAllMyBucketsResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+        f"<Owner><ID>stub</ID></Owner><Buckets>{buckets}</Buckets></ListAllMyBucketsResult>"
+    )
+
+
+def scan_check(s3_client, bucket_name):
+    # The check upload_file_to_s3 used to run before every upload.
+    response = s3_client.list_buckets()
+    existing_buckets = [bucket['Name'] for bucket in response['Buckets']]
+    if not bucket_name in existing_buckets:
+        s3_client.create_bucket(Bucket=bucket_name)
+
+
+def measure(check, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        check()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<34} mean {statistics.mean(timings):8.3f} ms   p50 {statistics.median(timings):8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--buckets", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    body = list_buckets_xml(args.buckets)
+    target = f"bucket-{args.buckets - 1:05d}"
+
+    def responder(method, path, params, request_body):
+        if method == "GET" and path == "/":
+            return 200, body, {"Content-Type": "application/xml"}
+        return 200, "", {}
+
+    with StubEndpoint(responder) as endpoint:
+        os.environ["AWS_ENDPOINT_URL"] = endpoint.url
+        s3_client = boto3.client("s3", region_name="us-east-1", config=Config(s3={"addressing_style": "path"}))
+        scan_check(s3_client, target)
+
+        report(f"list_buckets scan ({args.buckets} buckets)", measure(lambda: scan_check(s3_client, target), args.calls))
+
+        def cold_check():
+            aws_tools._known_buckets.discard(target)
+            aws_tools.ensure_bucket(s3_client, target)
+
+        report("head_bucket (cache cold)", measure(cold_check, args.calls))
+        report("ensure_bucket (cache warm)", measure(lambda: aws_tools.ensure_bucket(s3_client, target), args.calls))
+
+
+if __name__ == "__main__":
+    main()
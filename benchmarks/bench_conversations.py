@@ -0,0 +1,419 @@
+"""
+End-to-end latency of scripted multi-turn conversations driven through
+run.run_demo_loop, fully offline: a fake OpenAI-compatible server answers with
+canned tool-calling completions, a local stub endpoint plays EC2 and S3, and
+the Azure management clients are replaced by fakes whose pollers take a
+configurable time.
+
+Reports p50/p95 turn latency, tool throughput and memory, so every performance
+change can be checked for regressions without a network.
+
+Usage: python benchmarks/bench_conversations.py [--repeat N] [--stream] [--llm-latency S] [--azure-delay S]
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import itertools
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ["AZURE_SUBSCRIPTION_ID"] = "bench-subscription"
+# Every run provisions from scratch; bench_resource_state.py measures the resource state index.
+os.environ["RESOURCE_STATE_ENABLED"] = "false"
+
+from stub_endpoint import StubEndpoint
+
+
+def call(tool, **arguments):
+    return ("call", tool, arguments)
+
+
+def say(text):
+    return ("say", text, None)
+
+
+# Each conversation is a list of (user message, steps). A step is the assistant reply the
+# fake model gives next in that turn; steps calling a tool the active agent does not offer
+# (e.g., a router handoff the fast-path router already made) are skipped.
+CONVERSATIONS = {
+    "ec2-info": [
+        ("list my running ec2 instances", [
+            call("transfer_to_ec2_info_agent"),
+            call("get_ec2_info", state="running"),
+            say("You have several running instances; the newest are listed above."),
+        ]),
+        ("give me a summary of all my instances", [
+            call("get_ec2_info", summary=True),
+            say("Here is the summary of your instances by state and type."),
+        ]),
+        ("that's all, thanks", [
+            call("transfer_back_to_router_agent"),
+            say("Anything else I can help you with?"),
+        ]),
+    ],
+    "s3": [
+        ("which files can I upload to s3?", [
+            call("transfer_to_aws_s3_agent"),
+            call("get_available_files_to_upload"),
+            say("These files are available for upload."),
+        ]),
+        ("upload dog.jpg to bucket bench-bucket", [
+            call("upload_file_to_s3", file_name="dog.jpg", bucket_name="bench-bucket"),
+            say("dog.jpg was uploaded to bench-bucket."),
+        ]),
+        ("list my s3 buckets", [
+            call("list_s3_buckets"),
+            say("These are your buckets."),
+        ]),
+    ],
+    "ec2-launch": [
+        ("launch an ec2 instance named bench-web from ami-0abc1234, t2.micro, x86_64, key pair bench-key", [
+            call("transfer_to_launch_instance_agent"),
+            call("launch_ec2_instance", name="bench-web", image_id="ami-0abc1234", architecture="x86_64",
+                 instance_type="t2.micro", key_pair="bench-key"),
+            say("The launch has started in the background."),
+        ]),
+        ("wait for the launch to finish", [
+            call("wait_for_job", job_id="{job}"),
+            say("The instance is running."),
+        ]),
+    ],
+    "azure-vm": [
+        ("deploy an azure vm named bench-vm in eastus, resource group bench-rg, user azureuser, "
+         "password Bench-Passw0rd!", [
+            call("transfer_to_azure_vm_agent"),
+            call("deploy_azure_vm", resource_group_name="bench-rg", location="eastus", vm_name="bench-vm",
+                 username="azureuser", password="Bench-Passw0rd!"),
+            say("The deployment has started in the background."),
+        ]),
+        ("wait for the deployment", [
+            call("wait_for_job", job_id="{job}"),
+            say("The virtual machine is ready."),
+        ]),
+    ],
+    "azure-vnet": [
+        ("create an azure vnet named bench-vnet in resource group bench-rg in eastus", [
+            call("transfer_to_azure_vnet_agent"),
+            call("create_azure_vnet", resource_group_name="bench-rg", location="eastus", vnet_name="bench-vnet"),
+            say("The virtual network is being created."),
+        ]),
+        ("wait until it is done", [
+            call("wait_for_job", job_id="{job}"),
+            say("The virtual network is ready."),
+        ]),
+    ],
+}
+
+
+# Fake OpenAI-compatible server
+
+def _matches(step, reply):
+    tool_calls = reply.get("tool_calls") or []
+    if step[0] == "call":
+        return bool(tool_calls) and tool_calls[0]["function"]["name"] == step[1]
+    return not tool_calls
+
+
+def _next_step(steps, messages, offered):
+    last_user = max(i for i, m in enumerate(messages) if m["role"] == "user")
+    replies = [m for m in messages[last_user + 1:] if m["role"] == "assistant"]
+    done = 0
+    for step in steps:
+        if done < len(replies) and _matches(step, replies[done]):
+            done += 1
+        elif step[0] == "say" or step[1] in offered:
+            return step
+    return say("Done.")
+
+
+def _fill(arguments, messages):
+    jobs = re.findall(r"job-\d+", " ".join(m.get("content") or "" for m in messages if m["role"] == "tool"))
+    return {k: v.format(job=jobs[-1] if jobs else "job-0") if isinstance(v, str) else v
+            for k, v in arguments.items()}
+
+
+class FakeLLM:
+    """Answers chat completions from the conversation scripts, after `latency` seconds."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.ids = itertools.count(1)
+        self.steps = {}
+        for turns in CONVERSATIONS.values():
+            for message, steps in turns:
+                self.steps[message] = steps
+
+    def _reply(self, request):
+        messages = request["messages"]
+        user_message = next(m["content"] for m in reversed(messages) if m["role"] == "user")
+        offered = {tool["function"]["name"] for tool in request.get("tools") or []}
+        kind, value, arguments = _next_step(self.steps.get(user_message, []), messages, offered)
+        if kind == "say":
+            return {"role": "assistant", "content": value}
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{"id": f"call_{next(self.ids)}", "type": "function",
+                            "function": {"name": value, "arguments": json.dumps(_fill(arguments, messages))}}],
+        }
+
+    def respond(self, method, path, params, body):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, "", {}
+        request = json.loads(body)
+        self.calls += 1
+        time.sleep(self.latency)
+        message = self._reply(request)
+        base = {"id": f"bench-{self.calls}", "created": int(time.time()), "model": request["model"]}
+
+        if not request.get("stream"):
+            completion = dict(base, object="chat.completion", choices=[
+                {"index": 0, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                 "message": message}])
+            return 200, json.dumps(completion), {"Content-Type": "application/json"}
+
+        deltas = []
+        if message.get("tool_calls"):
+            deltas.append({"role": "assistant", "tool_calls": [dict(message["tool_calls"][0], index=0)]})
+        else:
+            words = message["content"].split(" ")
+            deltas.append({"role": "assistant", "content": words[0]})
+            deltas.extend({"content": " " + word} for word in words[1:])
+        events = [dict(base, object="chat.completion.chunk",
+                       choices=[{"index": 0, "delta": delta, "finish_reason": None}]) for delta in deltas]
+        payload = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return 200, payload, {"Content-Type": "text/event-stream"}
+
+
+# Stub EC2 and S3
+
+def _instance_xml(i):
+    return (
+        f"<item><instanceId>i-{i:017x}</instanceId><imageId>ami-0abc1234</imageId>"
+        f"<instanceState><code>16</code><name>running</name></instanceState>"
+        f"<instanceType>t2.micro</instanceType><launchTime>2024-01-{1 + i % 28:02d}T00:00:00.000Z</launchTime>"
+        f"<privateIpAddress>10.0.0.{i % 250}</privateIpAddress><vpcId>vpc-bench</vpcId>"
+        f"<tagSet><item><key>Name</key><value>bench-{i}</value></item></tagSet></item>"
+    )
+
+
+def aws_responder(instance_count):
+    ec2_ns = 'xmlns="http://ec2.amazonaws.com/doc/2016-11-15/"'
+    describe = (
+        f"<DescribeInstancesResponse {ec2_ns}><requestId>bench</requestId><reservationSet><item>"
+        f"<reservationId>r-bench</reservationId><instancesSet>"
+        + "".join(_instance_xml(i) for i in range(instance_count))
+        + "</instancesSet></item></reservationSet></DescribeInstancesResponse>"
+    )
+    run = (
+        f"<RunInstancesResponse {ec2_ns}><requestId>bench</requestId><reservationId>r-bench</reservationId>"
+        f"<instancesSet>{_instance_xml(instance_count)}</instancesSet></RunInstancesResponse>"
+    )
+    buckets = (
+        '<ListAllMyBucketsResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/"><Owner><ID>bench</ID></Owner>'
+        "<Buckets><Bucket><Name>bench-bucket</Name><CreationDate>2024-01-01T00:00:00.000Z</CreationDate>"
+        "</Bucket></Buckets></ListAllMyBucketsResult>"
+    )
+    xml = {"Content-Type": "text/xml"}
+
+    def respond(method, path, params, body):
+        action = params.get("Action")
+        if action == "DescribeInstances":
+            return 200, describe, xml
+        if action == "RunInstances":
+            return 200, run, xml
+        if method == "GET" and path == "/":
+            return 200, buckets, xml
+        if method == "PUT":
+            return 200, "", {"ETag": '"bench"'}
+        return 200, "", {}
+
+    return respond
+
+
+# Fake Azure management clients
+
+class FakePoller:
+    """An LROPoller that succeeds `delay` seconds after the operation started."""
+
+    def __init__(self, name, delay, parameters=None, store=None):
+        self.name = name
+        self.parameters = parameters or {}
+        self.store = store
+        self.finish_at = time.monotonic() + delay
+
+    def done(self):
+        return time.monotonic() >= self.finish_at
+
+    def status(self):
+        return "Succeeded" if self.done() else "InProgress"
+
+    def wait(self, timeout=None):
+        remaining = self.finish_at - time.monotonic()
+        time.sleep(max(0.0, remaining if timeout is None else min(remaining, timeout)))
+
+    def result(self):
+        self.wait()
+        address_space = self.parameters.get("address_space")
+        resource = types.SimpleNamespace(
+            name=self.name, id=f"/subscriptions/bench-subscription/{self.name}", location="eastus",
+            ip_address="20.0.0.1", address_prefix=self.parameters.get("address_prefix"), subnets=[],
+            address_space=types.SimpleNamespace(**address_space) if address_space else None,
+            ip_configurations=[types.SimpleNamespace(private_ip_address="10.0.0.4")],
+        )
+        if self.store is not None:
+            self.store[self.name] = resource
+        return resource
+
+
+class FakeOperations:
+    """One operations group (e.g., virtual_networks) that remembers what it created."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.created = {}
+
+    def begin_create_or_update(self, *args, **kwargs):
+        # Positional arguments end with (..., name, parameters).
+        return FakePoller(args[-2], self.delay, args[-1], self.created)
+
+    def create_or_update(self, name, parameters, **kwargs):
+        return FakePoller(name, self.delay / 4, parameters, self.created).result()
+
+    def get(self, *args, **kwargs):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        if args[-1] not in self.created:
+            raise ResourceNotFoundError(f"{args[-1]} not found")
+        return self.created[args[-1]]
+
+    def list_all(self):
+        return list(self.created.values())
+
+
+class FakeAzureClient:
+    def __init__(self, delay):
+        self.delay = delay
+        self.operations = {}
+
+    def __getattr__(self, name):
+        return self.operations.setdefault(name, FakeOperations(self.delay))
+
+    def close(self):
+        pass
+
+
+def install_fake_azure(delay):
+    import azure_clients
+
+    for kind in ("resource", "network", "compute"):
+        azure_clients._clients[(kind, "bench-subscription")] = FakeAzureClient(delay)
+
+
+# Driver
+
+class EndOfScript(Exception):
+    pass
+
+
+def run_conversation(run, turns, stream):
+    """Feed `turns` to run_demo_loop through input(); return the latency of every completed turn."""
+    messages = iter(message for message, _ in turns)
+    latencies = []
+    started = None
+
+    def scripted_input(prompt=""):
+        nonlocal started
+        if started is not None:
+            latencies.append(time.perf_counter() - started)
+        message = next(messages, None)
+        if message is None:
+            raise EndOfScript()
+        started = time.perf_counter()
+        return message
+
+    original_input = builtins.input
+    builtins.input = scripted_input
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            run.run_demo_loop(run.routerAgent, stream=stream)
+    finally:
+        builtins.input = original_input
+    if len(latencies) != len(turns):
+        raise RuntimeError(f"conversation stopped after {len(latencies)} of {len(turns)} turns:\n{output.getvalue()}")
+    return latencies
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="times each conversation is run")
+    parser.add_argument("--stream", action="store_true", help="stream completions, as the CLI does")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake completion")
+    parser.add_argument("--azure-delay", type=float, default=0.2, help="seconds per fake Azure poller")
+    parser.add_argument("--instances", type=int, default=50, help="instances returned by DescribeInstances")
+    parser.add_argument("--no-tool-cache", action="store_true", help="disable the read-only tool cache")
+    args = parser.parse_args()
+
+    if args.no_tool_cache:
+        os.environ["TOOL_CACHE_ENABLED"] = "false"
+
+    llm = FakeLLM(args.llm_latency)
+    with StubEndpoint(llm.respond) as llm_endpoint, StubEndpoint(aws_responder(args.instances)) as aws_endpoint:
+        os.environ["OLLAMA_BASE_URL"] = llm_endpoint.url + "/v1"
+        os.environ["AWS_ENDPOINT_URL"] = aws_endpoint.url
+        import run
+        import tracing
+
+        install_fake_azure(args.azure_delay)
+        tracing.reset_stats()
+
+        tracemalloc.start()
+        latencies = {name: [] for name in CONVERSATIONS}
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for name, turns in CONVERSATIONS.items():
+                latencies[name].extend(run_conversation(run, turns, args.stream))
+        wall = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stats = tracing.span_stats()
+    stats.pop("llm")
+    every_turn = [t for values in latencies.values() for t in values]
+    mode = "streaming" if args.stream else "non-streaming"
+    print(f"{len(every_turn)} turns ({mode}, LLM latency {args.llm_latency:g}s, Azure poller {args.azure_delay:g}s) "
+          f"in {wall:.2f}s, {llm.calls} completions, {aws_endpoint.requests} AWS requests")
+    print(f"{'conversation':<14} {'turns':>6} {'p50 s':>8} {'p95 s':>8} {'max s':>8}")
+    for name, values in list(latencies.items()) + [("all", every_turn)]:
+        print(f"{name:<14} {len(values):>6} {percentile(values, 50):>8.3f} {percentile(values, 95):>8.3f} "
+              f"{max(values):>8.3f}")
+
+    tools = {name: s for (kind, name), s in stats.items() if kind == "tool"}
+    tool_calls = sum(s["count"] for s in tools.values())
+    print(f"tool throughput: {tool_calls} calls, {tool_calls / wall:.1f} calls/s, "
+          f"{sum(s['seconds'] for s in tools.values()) / max(tool_calls, 1) * 1000:.1f} ms mean")
+    for name, s in sorted(tools.items(), key=lambda item: item[1]["seconds"], reverse=True):
+        print(f"  {name:<32} {s['count']:>5} calls {s['seconds'] / s['count'] * 1000:>9.1f} ms mean")
+    print(f"memory: peak {peak / 1024 / 1024:.1f} MiB traced, {current / 1024 / 1024:.1f} MiB still allocated at the end")
+
+
+if __name__ == "__main__":
+    main()
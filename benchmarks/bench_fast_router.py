@@ -0,0 +1,110 @@
+"""
+Time-to-first-action for a user message starting at the router agent, with and
+without the deterministic fast-path router, using an in-process fake LLM
+client with a fixed per-completion latency.
+
+Usage: python benchmarks/bench_fast_router.py [--llm-latency SECONDS]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from openai.types.chat import ChatCompletion
+from swarm import Swarm
+
+from agents import routerAgent
+import fast_router
+
+MESSAGES = [
+    "list my ec2 instances",
+    "upload dog.jpg to bucket demo-bucket",
+    "launch an ec2 instance from ami-0abc",
+    "deploy an azure vm",
+    "create a vnet called core",
+    "how many running instances do I have",
+    "what can you do?",
+]
+
+
+class FakeCompletions:
+    """Answers like the local model would: the router hands off, other agents reply."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def create(self, model, messages, tools=None, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        message = {"role": "assistant", "content": "Sure, what details should I use?"}
+
+        if messages[0]["content"] == routerAgent.instructions and messages[-1]["role"] == "user":
+            agent, _ = fast_router.classify(messages[-1]["content"])
+            if agent is not None:
+                name = next(f.__name__ for f in routerAgent.functions if f() is agent)
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{"id": f"call_{self.calls}", "type": "function",
+                                    "function": {"name": name, "arguments": "{}"}}],
+                }
+
+        return ChatCompletion.model_validate({
+            "id": f"fake-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+        })
+
+
+class FakeClient:
+    def __init__(self, latency):
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = FakeCompletions(latency)
+
+
+def time_to_first_action(client, message, use_fast_router):
+    start = time.perf_counter()
+    agent = routerAgent
+    if use_fast_router:
+        agent = fast_router.fast_route(message) or agent
+    # Stop after the first non-handoff reply: that is when the user sees the specialist act.
+    client.run(agent=agent, messages=[{"role": "user", "content": message}], max_turns=3)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake completion")
+    args = parser.parse_args()
+
+    fake = FakeClient(args.llm_latency)
+    client = Swarm(client=fake)
+
+    for use_fast_router in (False, True):
+        fake.chat.completions.calls = 0
+        timings = [time_to_first_action(client, m, use_fast_router) for m in MESSAGES]
+        label = "fast-path router" if use_fast_router else "LLM router only"
+        print(f"{label:<18} mean {statistics.mean(timings):6.2f}s   p50 {statistics.median(timings):6.2f}s   "
+              f"LLM calls {fake.chat.completions.calls}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        for m in MESSAGES:
+            fast_router.classify(m)
+    per_message = (time.perf_counter() - start) / (1000 * len(MESSAGES)) * 1e6
+    print(f"classifier cost    {per_message:.1f} us per message")
+    print("route hit rates:", json.dumps(fast_router.route_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
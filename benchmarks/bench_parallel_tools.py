@@ -0,0 +1,98 @@
+"""
+One assistant message issuing several get_ec2_info calls (one per region),
+executed by plain Swarm (one call after another) and by ParallelSwarm (all at
+once), against a local stub EC2 endpoint with a fixed per-request latency.
+With --hang, one extra call never gets an answer, to show the per-tool timeout.
+
+Usage: python benchmarks/bench_parallel_tools.py [--calls N] [--api-latency S] [--hang]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+# Every call must reach the endpoint.
+os.environ["TOOL_CACHE_ENABLED"] = "false"
+
+from openai.types.chat import ChatCompletion
+from swarm import Swarm
+
+from agents import ec2InfoAgent
+from aws_clients import DEFAULT_REGION, get_client
+from parallel_swarm import ParallelSwarm
+from stub_endpoint import EMPTY_DESCRIBE_INSTANCES, StubEndpoint
+
+REGIONS = ["us-east-1", "us-east-2", "us-west-1", "us-west-2", "eu-west-1", "eu-central-1",
+           "ap-south-1", "ap-northeast-1", "ap-southeast-1", "sa-east-1"]
+HANG_TYPE = "hang.large"
+
+
+class FakeCompletions:
+    """Asks for every tool call at once, then answers once the results are in."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def create(self, model, messages, **kwargs):
+        if messages[-1]["role"] == "user":
+            message = {"role": "assistant", "content": None, "tool_calls": [
+                {"id": f"call_{i}", "type": "function", "function": {"name": "get_ec2_info", "arguments": arguments}}
+                for i, arguments in enumerate(self.calls)
+            ]}
+        else:
+            message = {"role": "assistant", "content": "Here are your instances."}
+        return ChatCompletion.model_validate({
+            "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+        })
+
+
+class FakeClient:
+    def __init__(self, calls):
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = FakeCompletions(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=6, help="tool calls in the message (at most 10)")
+    parser.add_argument("--api-latency", type=float, default=0.2, help="seconds per stub EC2 request")
+    parser.add_argument("--hang", action="store_true", help="add a call whose request never completes")
+    parser.add_argument("--timeout", type=float, default=2.0, help="ParallelSwarm per-tool timeout")
+    args = parser.parse_args()
+
+    calls = [f'{{"region": "{region}"}}' for region in REGIONS[:args.calls]]
+    if args.hang:
+        calls.append(f'{{"instance_type": "{HANG_TYPE}"}}')
+
+    def responder(method, path, params, body):
+        time.sleep(600 if HANG_TYPE in params.values() else args.api_latency)
+        return 200, EMPTY_DESCRIBE_INSTANCES, {}
+
+    with StubEndpoint(responder) as endpoint:
+        os.environ["AWS_ENDPOINT_URL"] = endpoint.url
+        # Create the pooled clients up front so neither runner pays for SDK imports and client setup.
+        for region in REGIONS[:args.calls] + [DEFAULT_REGION]:
+            get_client("ec2", region)
+        runners = [("ParallelSwarm", ParallelSwarm(client=FakeClient(calls), timeout=args.timeout))]
+        # A hung call would stall plain Swarm until the SDK's own read timeout.
+        if not args.hang:
+            runners.insert(0, ("Swarm (sequential)", Swarm(client=FakeClient(calls))))
+
+        for label, client in runners:
+            start = time.perf_counter()
+            response = client.run(agent=ec2InfoAgent, messages=[{"role": "user", "content": "list my instances"}])
+            elapsed = time.perf_counter() - start
+            tool_messages = [m for m in response.messages if m["role"] == "tool"]
+            timed_out = sum("timed out" in m["content"] for m in tool_messages)
+            in_order = [m["tool_call_id"] for m in tool_messages] == [f"call_{i}" for i in range(len(calls))]
+            print(f"{label:<20} {len(tool_messages)} tool calls in {elapsed:.2f}s, "
+                  f"{timed_out} timed out, results in call order: {in_order}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Re-running deploy_azure_vm with and without the resource state index, against
+fake Azure clients whose long-running operations take a fixed time: a deploy
+resumed after its VM step failed, and a repeat of a finished deploy. Reports
+the time taken and the create-or-update (PUT) calls sent.
+
+Then checks launch_ec2_instance's idempotency tokens against a fake EC2
+client: two concurrent launches of the same name must start two instances,
+and a launch whose outcome was lost must be retried with its token. Exits
+with status 1 if either check fails.
+
+Usage: python benchmarks/bench_resource_state.py [--azure-delay S]
+"""
+import argparse
+from collections import Counter
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ["AZURE_SUBSCRIPTION_ID"] = "bench-subscription"
+_state_dir = tempfile.TemporaryDirectory()
+os.environ["RESOURCE_STATE_PATH"] = os.path.join(_state_dir.name, "resource_state.sqlite3")
+
+import aws_tools
+from azure_tools import deploy_azure_vm
+from bench_conversations import FakeOperations, install_fake_azure
+import progress
+import resource_state
+
+puts = Counter()
+fail_vm = {"armed": False}
+
+
+def count_puts(method):
+    def wrapper(self, *args, **kwargs):
+        # Only the VM's parameters have a hardware profile.
+        if fail_vm["armed"] and "hardware_profile" in args[-1]:
+            fail_vm["armed"] = False
+            raise RuntimeError("simulated VM failure")
+        puts["put"] += 1
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+FakeOperations.begin_create_or_update = count_puts(FakeOperations.begin_create_or_update)
+FakeOperations.create_or_update = count_puts(FakeOperations.create_or_update)
+
+
+def timed_deploy(vm_name):
+    puts.clear()
+    start = time.perf_counter()
+    result = deploy_azure_vm("bench-rg", "eastus", vm_name, "azureuser", "Bench-Passw0rd!")
+    return time.perf_counter() - start, puts["put"], result
+
+
+class FakeEC2:
+    """RunInstances with EC2's idempotency: a repeated ClientToken returns the instance it launched."""
+
+    def __init__(self, delay, fail_first=False):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.instances = {}
+        self.lock = threading.Lock()
+
+    def run_instances(self, ClientToken, **params):
+        time.sleep(self.delay)
+        with self.lock:
+            instance_id = self.instances.setdefault(ClientToken, f"i-{len(self.instances):017d}")
+            if self.fail_first:
+                # The instance starts, but the response is lost.
+                self.fail_first = False
+                raise TimeoutError("Read timeout on endpoint URL")
+        return {"Instances": [{"InstanceId": instance_id, "State": {"Name": "pending"},
+                               "InstanceType": params["InstanceType"]}]}
+
+
+def check_ec2_launches(delay):
+    ok = True
+    launch = lambda name: aws_tools.launch_ec2_instance(name, "ami-bench", "x86_64", "t2.micro", "bench-key")
+
+    ec2 = FakeEC2(delay)
+    aws_tools.get_client = lambda *args, **kwargs: ec2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(launch("same-name"))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = {result.get("InstanceId") for result in results}
+    print(f"two concurrent same-name launches: {len(ec2.instances)} instances started, "
+          f"{len(ids)} distinct IDs returned")
+    ok &= len(ec2.instances) == 2 and len(ids) == 2
+
+    ec2 = FakeEC2(0, fail_first=True)
+    aws_tools.get_client = lambda *args, **kwargs: ec2
+    first, retried = launch("lost-response"), launch("lost-response")
+    print(f"launch retried after a lost response: {first.get('Error')!r}, then {retried.get('InstanceId')}, "
+          f"{len(ec2.instances)} instance started")
+    ok &= len(ec2.instances) == 1 and retried.get("InstanceId") in ec2.instances.values()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--azure-delay", type=float, default=0.2, help="seconds per fake long-running operation")
+    args = parser.parse_args()
+    progress.PROGRESS_POLL_SECONDS = args.azure_delay / 4
+
+    for enabled in (False, True):
+        resource_state.RESOURCE_STATE_ENABLED = enabled
+        label = "with index" if enabled else "without index"
+        install_fake_azure(args.azure_delay)
+        vm_name = f"vm-{'indexed' if enabled else 'plain'}"
+
+        fail_vm["armed"] = True
+        seconds, count, result = timed_deploy(vm_name)
+        print(f"{label:<14} first deploy  {seconds:5.2f}s, {count} PUTs ({result})")
+        seconds, count, _ = timed_deploy(vm_name)
+        print(f"{label:<14} resumed       {seconds:5.2f}s, {count} PUTs")
+        seconds, count, _ = timed_deploy(vm_name)
+        print(f"{label:<14} repeated      {seconds:5.2f}s, {count} PUTs")
+
+    resource_state.RESOURCE_STATE_ENABLED = True
+    if not check_ec2_launches(args.azure_delay):
+        print("FAILED: launch_ec2_instance reused a token it should not have, or lost one it should have kept")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
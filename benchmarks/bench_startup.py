@@ -0,0 +1,95 @@
+"""
+Time-to-first-prompt of the CLI: starts `python -X importtime run.py` until it
+prints the "User:" prompt, and breaks the import time down by package from the
+importtime log. The heavy cloud SDKs (boto3, s3transfer, azure) should not be
+imported before the first prompt; only the small botocore.exceptions is.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N]
+"""
+import argparse
+from collections import defaultdict
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Packages reported separately; the heavy SDKs are expected to be absent before the first prompt.
+PACKAGES = ("openai", "swarm", "pydantic", "httpx", "boto3", "botocore", "s3transfer", "azure")
+HEAVY_SDKS = ("boto3", "s3transfer", "azure")
+
+
+def time_to_prompt():
+    """Start the CLI, wait for the first prompt, then close stdin. Returns (seconds, importtime log)."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    # The importtime log goes to a file: a full stderr pipe would block the CLI before its prompt.
+    with tempfile.TemporaryFile() as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-X", "importtime", "run.py"], cwd=ROOT, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log,
+        )
+        output = b""
+        while b"User:" not in output:
+            byte = process.stdout.read(1)
+            if not byte:
+                process.wait()
+                log.seek(0)
+                raise RuntimeError("run.py exited before showing a prompt:\n" + log.read().decode()[-2000:])
+            output += byte
+        elapsed = time.perf_counter() - start
+        # Closing stdin makes input() raise EOFError, which ends the loop.
+        process.communicate(input=b"", timeout=30)
+        log.seek(0)
+        return elapsed, log.read().decode()
+
+
+def parse_importtime(log):
+    """Return {module: (self_us, cumulative_us)} from an importtime log."""
+    modules = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args()
+
+    timings = []
+    modules = {}
+    for _ in range(args.runs):
+        elapsed, log = time_to_prompt()
+        timings.append(elapsed)
+        modules = parse_importtime(log)
+
+    print(f"time to first prompt over {args.runs} runs: median {statistics.median(timings):.3f}s, "
+          f"min {min(timings):.3f}s, max {max(timings):.3f}s")
+
+    by_package = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        by_package[name.split(".")[0]] += self_us
+    total = sum(by_package.values())
+    print(f"import time (last run): {total / 1e6:.3f}s in {len(modules)} modules")
+    for package in PACKAGES:
+        if by_package.get(package):
+            print(f"  {package:<12} {by_package[package] / 1e6:7.3f}s")
+
+    loaded = sorted({name.split(".")[0] for name in modules} & set(HEAVY_SDKS))
+    print("heavy cloud SDKs imported before the prompt:", ", ".join(loaded) if loaded else "none")
+
+    print("slowest modules by self time:")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda m: m[1][0], reverse=True)[:args.top]:
+        print(f"  {name:<56} {self_us / 1000:8.1f} ms  ({cumulative_us / 1000:.1f} ms cumulative)")
+
+
+if __name__ == "__main__":
+    main()
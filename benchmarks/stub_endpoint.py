@@ -0,0 +1,68 @@
+"""
+A tiny local HTTP endpoint that answers AWS query/REST calls with canned bodies.
+
+Used by the benchmarks so they can exercise real botocore request signing,
+serialization and connection pooling without talking to AWS.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+EMPTY_DESCRIBE_INSTANCES = (
+    '<DescribeInstancesResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/">'
+    "<requestId>stub</requestId><reservationSet/></DescribeInstancesResponse>"
+)
+
+
+class StubEndpoint:
+    """
+    Serve canned responses on 127.0.0.1 in a background thread.
+
+    `responder` is called with (method, path, params, body) and returns
+    (status, body, headers). The default responder answers every call with an
+    empty EC2 DescribeInstances response.
+    """
+
+    def __init__(self, responder=None):
+        self.responder = responder or (lambda method, path, params, body: (200, EMPTY_DESCRIBE_INSTANCES, {}))
+        self.requests = 0
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                path, _, query = self.path.partition("?")
+                params = {k: v[0] for k, v in parse_qs(query).items()}
+                if body and self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                    params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+                endpoint.requests += 1
+                status, payload, headers = endpoint.responder(self.command, path, params, body)
+                payload = payload.encode() if isinstance(payload, str) else payload
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_HEAD = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
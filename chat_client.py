@@ -0,0 +1,34 @@
+class _Completions:
+    def __init__(self, create):
+        self._create = create
+
+    def create(self, **params):
+        return self._create(params)
+
+
+class _Chat:
+    def __init__(self, create):
+        self.completions = _Completions(create)
+
+
+class ChatClientWrapper:
+    """
+    Base for wrappers of the OpenAI client passed to `Swarm(client=...)`.
+
+    Exposes `chat.completions.create`, the only method Swarm calls, and
+    routes it to `_create(params)`. Subclasses override `_create` and call
+    the wrapped client, itself possibly another wrapper, as
+    `self.client.chat.completions.create(**params)`.
+
+    Parameters
+    ----------
+    client : openai.OpenAI
+        The client to wrap.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.chat = _Chat(self._create)
+
+    def _create(self, params):
+        return self.client.chat.completions.create(**params)
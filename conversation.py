@@ -0,0 +1,167 @@
+import os
+
+
+# Approximate prompt size, in tokens, the history is compacted down to before each turn.
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "3000"))
+# The most recent turns are always sent verbatim.
+HISTORY_KEEP_RECENT_TURNS = int(os.environ.get("HISTORY_KEEP_RECENT_TURNS", "2"))
+# Older turns handled by the active agent that are also kept verbatim.
+HISTORY_KEEP_ACTIVE_AGENT_TURNS = int(os.environ.get("HISTORY_KEEP_ACTIVE_AGENT_TURNS", "2"))
+# Tool outputs in older turns are cut down to this many tokens.
+HISTORY_MAX_TOOL_OUTPUT_TOKENS = int(os.environ.get("HISTORY_MAX_TOOL_OUTPUT_TOKENS", "200"))
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+SUMMARY_SNIPPET_CHARS = 160
+
+
+def estimate_tokens(message):
+    """Roughly estimate the tokens a message costs in the prompt (about 4 characters per token)."""
+    size = len(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        size += len(function.get("name") or "") + len(function.get("arguments") or "")
+    return size // 4 + 4
+
+
+def _snippet(text, limit=SUMMARY_SNIPPET_CHARS):
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _summarize_turn(turn):
+    parts = []
+    for message in turn:
+        if message["role"] == "user":
+            parts.append(f"User: {_snippet(message['content'])}")
+        elif message["role"] == "assistant":
+            sender = message.get("sender") or "Assistant"
+            for tool_call in message.get("tool_calls") or []:
+                function = tool_call["function"]
+                parts.append(f"{sender} called {function['name']}({_snippet(function['arguments'], 80)})")
+            if message.get("content"):
+                parts.append(f"{sender}: {_snippet(message['content'])}")
+    return "- " + "; ".join(parts)
+
+
+class ConversationHistory:
+    """
+    The message list sent to the model, kept within a token budget.
+
+    Before each turn `compact` shrinks the history in two passes, oldest turns
+    first, until it fits the budget:
+
+    1. large tool outputs outside the verbatim turns are truncated;
+    2. whole turns outside the verbatim turns are replaced by a one-line
+       extractive summary in a single system message at the start.
+
+    The most recent turns, and the latest turns handled by the active agent,
+    are always kept verbatim. Whole turns are dropped so every tool result
+    stays paired with the assistant message that called it.
+    """
+
+    def __init__(self, token_budget=None, keep_recent_turns=None, keep_active_agent_turns=None,
+                 max_tool_output_tokens=None):
+        self.token_budget = token_budget or HISTORY_TOKEN_BUDGET
+        self.keep_recent_turns = HISTORY_KEEP_RECENT_TURNS if keep_recent_turns is None else keep_recent_turns
+        self.keep_active_agent_turns = (HISTORY_KEEP_ACTIVE_AGENT_TURNS if keep_active_agent_turns is None
+                                        else keep_active_agent_turns)
+        self.max_tool_output_tokens = max_tool_output_tokens or HISTORY_MAX_TOOL_OUTPUT_TOKENS
+        self.messages = []
+        self.tokens_saved = 0
+
+    def append(self, message):
+        self.messages.append(message)
+
+    def extend(self, messages):
+        self.messages.extend(messages)
+
+    def token_count(self):
+        return sum(estimate_tokens(m) for m in self.messages)
+
+    def _split(self):
+        summary = None
+        messages = self.messages
+        if messages and messages[0]["role"] == "system" and messages[0]["content"].startswith(SUMMARY_PREFIX):
+            summary, messages = messages[0], messages[1:]
+
+        turns = []
+        for message in messages:
+            if message["role"] == "user" or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return summary, turns
+
+    def _verbatim(self, turns, active_agent):
+        keep = set(range(max(0, len(turns) - self.keep_recent_turns), len(turns)))
+        active_turns = [
+            i for i, turn in enumerate(turns)
+            if i not in keep and any(m.get("sender") == active_agent for m in turn if m["role"] == "assistant")
+        ]
+        if self.keep_active_agent_turns:
+            keep.update(active_turns[-self.keep_active_agent_turns:])
+        return keep
+
+    def compact(self, active_agent=None):
+        """
+        Shrink the history to the token budget.
+
+        Parameters
+        ----------
+        active_agent : str, optional
+            Name of the agent that will handle the next turn; its latest turns are kept verbatim.
+
+        Returns
+        -------
+        tuple
+            (tokens_before, tokens_after) estimated for the whole history.
+        """
+        before = self.token_count()
+        if before <= self.token_budget:
+            return before, before
+
+        summary, turns = self._split()
+        verbatim = self._verbatim(turns, active_agent)
+        total = before
+
+        # Pass 1: truncate large tool outputs in older turns.
+        limit = self.max_tool_output_tokens * 4
+        for i, turn in enumerate(turns):
+            if total <= self.token_budget:
+                break
+            if i in verbatim:
+                continue
+            for j, message in enumerate(turn):
+                content = message.get("content") or ""
+                if message["role"] == "tool" and len(content) > limit:
+                    truncated = dict(message, content=f"{content[:limit]}... [truncated {len(content) - limit} characters]")
+                    total -= estimate_tokens(message) - estimate_tokens(truncated)
+                    turn[j] = truncated
+
+        # Pass 2: fold the oldest turns into the summary.
+        lines = summary["content"].splitlines()[1:] if summary else []
+        folded = set()
+        for i, turn in enumerate(turns):
+            if total <= self.token_budget:
+                break
+            if i in verbatim:
+                continue
+            line = _summarize_turn(turn)
+            total -= sum(estimate_tokens(m) for m in turn) - len(line) // 4
+            lines.append(line)
+            folded.add(i)
+
+        # The summary itself gets at most a quarter of the budget; the oldest lines go first.
+        while len(lines) > 1 and sum(len(line) for line in lines) // 4 > self.token_budget // 4:
+            lines.pop(0)
+
+        messages = []
+        if lines:
+            messages.append({"role": "system", "content": "\n".join([SUMMARY_PREFIX] + lines)})
+        for i, turn in enumerate(turns):
+            if i not in folded:
+                messages.extend(turn)
+        self.messages = messages
+
+        after = self.token_count()
+        self.tokens_saved += before - after
+        return before, after
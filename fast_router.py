@@ -0,0 +1,133 @@
+from collections import Counter
+import os
+import re
+import threading
+
+from agents import awsS3Agent, azureVMAgent, azureVNETAgent, ec2InfoAgent, launchInstanceAgent
+
+
+FAST_ROUTER_ENABLED = os.environ.get("FAST_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Minimum share of the total match score the best agent needs before the LLM router is skipped.
+FAST_ROUTER_MIN_CONFIDENCE = float(os.environ.get("FAST_ROUTER_MIN_CONFIDENCE", "0.75"))
+# Minimum absolute score, so a single weak keyword never bypasses the LLM router.
+FAST_ROUTER_MIN_SCORE = float(os.environ.get("FAST_ROUTER_MIN_SCORE", "1.5"))
+
+# (agent, [(pattern, weight), ...]). A message scores the sum of the weights of the patterns it matches.
+ROUTES = [
+    (ec2InfoAgent, [
+        (r"\b(list|show|describe|get|display|what|which|how many|count)\b.*\b(ec2|instances?|servers?)\b", 2.0),
+        (r"\b(inventory|running instances|stopped instances)\b", 1.5),
+        (r"\bec2\b", 0.5),
+    ]),
+    (launchInstanceAgent, [
+        (r"\b(launch|spin up|provision|create|start|run)\b.*\b(ec2|instances?|fleet|servers?)\b", 2.0),
+        (r"\bami-[0-9a-f]+\b", 1.0),
+        (r"\bec2\b", 0.5),
+    ]),
+    (awsS3Agent, [
+        (r"\bupload\b", 2.0),
+        (r"\b(s3|buckets?)\b", 1.5),
+        (r"\b[\w.-]+\.(jpe?g|png|gif|webp|txt|csv|json|zip|pdf)\b", 1.0),
+    ]),
+    (azureVMAgent, [
+        (r"\b(deploy|create|provision|launch)\b.*\b(vms?|virtual machines?)\b", 2.0),
+        (r"\bazure\b.*\b(vms?|virtual machines?)\b", 1.5),
+    ]),
+    (azureVNETAgent, [
+        (r"\b(vnets?|virtual networks?)\b", 2.0),
+        (r"\bsubnets?\b", 0.5),
+    ]),
+]
+
+_compiled = [(agent, [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns])
+             for agent, patterns in ROUTES]
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _classify(message):
+    scores = []
+    for agent, patterns in _compiled:
+        score = sum(weight for pattern, weight in patterns if pattern.search(message))
+        if score:
+            scores.append((score, agent))
+
+    if not scores:
+        return None, 0.0, 0.0
+
+    scores.sort(key=lambda s: s[0], reverse=True)
+    best_score, best_agent = scores[0]
+    return best_agent, best_score / sum(score for score, _ in scores), best_score
+
+
+def classify(message):
+    """
+    Score a user message against every route.
+
+    Parameters
+    ----------
+    message : str
+        The user's message.
+
+    Returns
+    -------
+    tuple
+        (agent, confidence): the best-scoring agent (None if nothing matched) and
+        its share of the total score, between 0 and 1.
+    """
+    agent, confidence, _ = _classify(message)
+    return agent, confidence
+
+
+def fast_route(message):
+    """
+    Pick the agent for an unambiguous request without asking the LLM router.
+
+    Parameters
+    ----------
+    message : str
+        The user's message.
+
+    Returns
+    -------
+    Agent or None
+        The agent to hand the message to directly, or None to fall back to the LLM router.
+    """
+    if not FAST_ROUTER_ENABLED:
+        return None
+
+    agent, confidence, score = _classify(message)
+    routed = agent is not None and confidence >= FAST_ROUTER_MIN_CONFIDENCE and score >= FAST_ROUTER_MIN_SCORE
+
+    with _stats_lock:
+        _stats["messages"] += 1
+        _stats[agent.name if routed else "llm_router"] += 1
+
+    return agent if routed else None
+
+
+def route_stats():
+    """
+    Return how often each route was taken.
+
+    Returns
+    -------
+    dict
+        For every route (and 'llm_router' for fallbacks): the count and its share of all messages.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    total = stats.pop("messages", 0)
+    return {route: {"count": count, "rate": count / total} for route, count in stats.items()}
+
+
+def format_stats():
+    """Format the route counts as one line, most taken first."""
+    stats = route_stats()
+    if not stats:
+        return "No messages routed."
+    routes = sorted(stats.items(), key=lambda item: -item[1]["count"])
+    return "Routes: " + ", ".join(f"{route} {s['count']} ({s['rate']:.0%})" for route, s in routes)
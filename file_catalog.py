@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+
+import s3_transfer
+
+
+FILE_CATALOG_PATH = os.environ.get("FILE_CATALOG_PATH", ".file_catalog.sqlite3")
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class FileCatalog:
+    """
+    A persistent index of the files under `root`: relative path, size, mtime and S3 ETag.
+
+    `refresh` walks the directory and compares each file's size and mtime
+    with the stored entry, so only new and modified files are touched and
+    deleted files are dropped; it never reads file contents. ETags are
+    computed the first time they are needed (see `etag`) and kept until the
+    file changes, so an unchanged file is hashed at most once, even across
+    restarts.
+
+    Parameters
+    ----------
+    root : str
+        The directory to index.
+    path : str
+        The SQLite database file. One database can hold several roots.
+    """
+
+    def __init__(self, root, path=FILE_CATALOG_PATH):
+        self.root = os.path.realpath(root)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # The catalog can always be rebuilt from the directory, so it trades durability for cheap commits.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "root TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "etag TEXT, etag_part_size INTEGER, PRIMARY KEY (root, path))"
+        )
+        self._db.commit()
+
+    def _scan(self):
+        found = {}
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                full_path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                found[os.path.relpath(full_path, self.root).replace(os.sep, "/")] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def refresh(self):
+        """
+        Bring the catalog in line with the directory.
+
+        Returns
+        -------
+        tuple
+            (added, changed, removed) file counts.
+        """
+        found = self._scan()
+        with self._lock:
+            known = {
+                path: (size, mtime_ns)
+                for path, size, mtime_ns in self._db.execute(
+                    "SELECT path, size, mtime_ns FROM files WHERE root = ?", (self.root,)
+                )
+            }
+            upserts = [(self.root, path, size, mtime_ns) for path, (size, mtime_ns) in found.items()
+                       if known.get(path) != (size, mtime_ns)]
+            removed = [(self.root, path) for path in known.keys() - found.keys()]
+            # A changed file loses its ETag; it is recomputed on next use.
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files (root, path, size, mtime_ns) VALUES (?, ?, ?, ?)", upserts
+            )
+            self._db.executemany("DELETE FROM files WHERE root = ? AND path = ?", removed)
+            self._db.commit()
+        added = sum(1 for _, path, _, _ in upserts if path not in known)
+        return added, len(upserts) - added, len(removed)
+
+    def query(self, prefix=None, extension=None, min_size=None, max_size=None, offset=0, limit=50):
+        """
+        Find catalogued files, ordered by path.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Only paths starting with this (e.g., 'images/').
+        extension : str, optional
+            Only files with this extension, case-insensitive (e.g., 'jpg' or '.jpg').
+        min_size, max_size : int, optional
+            Size bounds in bytes, inclusive.
+        offset, limit : int
+            The slice of matching files to return.
+
+        Returns
+        -------
+        tuple
+            (total_count, total_bytes, files): totals over every match and a
+            list of (path, size) for the requested slice.
+        """
+        clauses, params = ["root = ?"], [self.root]
+        if prefix:
+            clauses.append("path LIKE ? ESCAPE '\\'")
+            params.append(_escape_like(prefix[2:] if prefix.startswith("./") else prefix) + "%")
+        if extension:
+            clauses.append("lower(path) LIKE ? ESCAPE '\\'")
+            params.append("%." + _escape_like(extension.lower().lstrip(".")))
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(int(min_size))
+        if max_size is not None:
+            clauses.append("size <= ?")
+            params.append(int(max_size))
+        where = " AND ".join(clauses)
+        with self._lock:
+            total_count, total_bytes = self._db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files WHERE {where}", params
+            ).fetchone()
+            files = self._db.execute(
+                f"SELECT path, size FROM files WHERE {where} ORDER BY path LIMIT ? OFFSET ?",
+                params + [int(limit), int(offset)],
+            ).fetchall()
+        return total_count, total_bytes, files
+
+    def etag(self, file_path, chunk_size_mb=None):
+        """
+        Return the S3 ETag of `file_path`, as `s3_transfer.local_etag` would, hashing the file only if it changed.
+
+        Files outside the catalog's root are hashed every time.
+        """
+        stat = os.stat(file_path)
+        part_size = s3_transfer.etag_part_size(stat.st_size, chunk_size_mb)
+        path = os.path.relpath(os.path.realpath(file_path), self.root).replace(os.sep, "/")
+        if path.startswith("../"):
+            return s3_transfer.local_etag(file_path, chunk_size_mb)
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, etag, etag_part_size FROM files WHERE root = ? AND path = ?",
+                (self.root, path),
+            ).fetchone()
+        if row and row[2] and row[:2] == (stat.st_size, stat.st_mtime_ns) and row[3] == part_size:
+            return row[2]
+
+        # Hash outside the lock so several uploads can hash at once.
+        etag = s3_transfer.local_etag(file_path, chunk_size_mb)
+        if os.stat(file_path).st_mtime_ns != stat.st_mtime_ns:
+            return etag
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (root, path, size, mtime_ns, etag, etag_part_size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.root, path, stat.st_size, stat.st_mtime_ns, etag, part_size),
+            )
+            self._db.commit()
+        return etag
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def get_catalog(root):
+    """Return the shared FileCatalog for `root`, opening it on first use."""
+    root = os.path.realpath(root)
+    with _catalogs_lock:
+        if root not in _catalogs:
+            _catalogs[root] = FileCatalog(root)
+        return _catalogs[root]
@@ -0,0 +1,241 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import contextmanager
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import time
+
+import progress
+from tracing import span
+
+
+JOB_MAX_WORKERS = int(os.environ.get("JOB_MAX_WORKERS", "4"))
+# Seconds a job is kept after its result was reported, and finished jobs kept at most, oldest dropped first.
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_FINISHED = int(os.environ.get("JOB_MAX_FINISHED", "500"))
+
+_executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix="job")
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_jobs = {}
+# The server session whose turn is running; None in the CLI. Each session only sees its own jobs.
+_session = contextvars.ContextVar("job_session", default=None)
+
+
+class Job:
+    """A tool call running on the background executor."""
+
+    def __init__(self, name, arguments, session_id=None):
+        self.id = f"job-{next(_ids)}"
+        self.name = name
+        self.arguments = arguments
+        self.session_id = session_id
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.announced = False
+        self.future = None
+        self.progress = None
+
+    def _record_progress(self, event):
+        self.progress = event["message"]
+
+    def _run(self, func, args, kwargs):
+        self.status = "running"
+        self.started_at = time.time()
+        try:
+            # The job's latest progress message is shown by get_job_status while it runs.
+            with span(self.name, kind="job", job_id=self.id), progress.listen(self._record_progress):
+                self.result = func(*args, **kwargs)
+            self.status = "succeeded"
+        except Exception as e:
+            self.error = str(e)
+            self.status = "failed"
+        finally:
+            self.finished_at = time.time()
+        return self.result
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+    def describe(self):
+        if self.status == "pending":
+            detail = "waiting for a free worker"
+        elif self.status == "running":
+            detail = f"running for {time.time() - self.started_at:.0f}s"
+            if self.progress:
+                detail += f". Latest progress: {self.progress}"
+        elif self.status == "succeeded":
+            detail = f"finished in {self.finished_at - self.started_at:.1f}s. Result: {self.result}"
+        else:
+            detail = f"failed after {self.finished_at - self.started_at:.1f}s. Error: {self.error}"
+        return f"{self.id} ({self.name}{self.arguments}): {self.status}, {detail}"
+
+
+@contextmanager
+def session_scope(session_id):
+    """Tie the jobs started in this context to `session_id`; the job tools then only see that session's jobs."""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+def current_session_id():
+    """The server session whose turn is running in this context, or None in the CLI."""
+    return _session.get()
+
+
+def _visible_jobs():
+    session_id = _session.get()
+    with _lock:
+        return [job for job in _jobs.values() if job.session_id == session_id]
+
+
+def submit(func, *args, **kwargs):
+    """
+    Run `func(*args, **kwargs)` on the background executor.
+
+    Returns
+    -------
+    Job
+        The job handle; its id can be passed to get_job_status and wait_for_job.
+    """
+    shown = [repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items() if k != "password"]
+    job = Job(func.__name__, f"({', '.join(shown)})", _session.get())
+    with _lock:
+        _prune()
+        _jobs[job.id] = job
+    # The job runs in a copy of the submitting context, so its spans belong to the turn that started it.
+    job.future = _executor.submit(contextvars.copy_context().run, job._run, func, args, kwargs)
+    return job
+
+
+def _prune():
+    # Called with _lock held. Jobs are registered in submission order, so the oldest come first.
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    finished = [job for job in _jobs.values() if job.done]
+    expired = {job.id for job in finished if job.announced and job.finished_at < cutoff}
+    kept = [job for job in finished if job.id not in expired]
+    excess = {job.id for job in kept[:max(0, len(kept) - JOB_MAX_FINISHED)]}
+    for job_id in expired | excess:
+        del _jobs[job_id]
+
+
+def drop_session_jobs(session_id):
+    """
+    Forget every job of a session that has ended. Jobs still running finish, but their results are discarded.
+
+    Returns
+    -------
+    int
+        The number of jobs dropped.
+    """
+    with _lock:
+        dropped = [job_id for job_id, job in _jobs.items() if job.session_id == session_id]
+        for job_id in dropped:
+            del _jobs[job_id]
+    return len(dropped)
+
+
+def background_tool(func):
+    """
+    Wrap a long-running tool so a call starts a background job and returns its id right away.
+
+    The wrapper keeps the tool's name and signature, so the model calls it
+    exactly as before and then follows up with get_job_status or wait_for_job.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        job = submit(func, *args, **kwargs)
+        return (f"Started {func.__name__} as background job {job.id}. "
+                f"Call get_job_status('{job.id}') to check progress or wait_for_job('{job.id}') to wait for the result.")
+
+    wrapper.__doc__ = (func.__doc__ or "") + (
+        "\n    This tool runs in the background: it returns a job ID immediately, and the result is "
+        "available from get_job_status or wait_for_job.\n"
+    )
+    return wrapper
+
+
+def get_job(job_id):
+    """Return the job with this ID if it was started by the current session, else None."""
+    with _lock:
+        job = _jobs.get(str(job_id).strip())
+    if job is None or job.session_id != _session.get():
+        return None
+    return job
+
+
+def get_job_status(job_id=None):
+    """
+    Returns the status of a background job, or of all jobs started in this conversation if no job ID is given.
+
+    Parameters
+    ----------
+    job_id : str, optional
+        The job ID returned when the job was started (e.g., 'job-1').
+
+    Returns
+    -------
+    str
+        The job status, with its result or error once finished.
+    """
+    jobs = [get_job(job_id)] if job_id else _visible_jobs()
+    if job_id and jobs[0] is None:
+        return f"No job with ID '{job_id}'."
+    if not jobs:
+        return "No background jobs have been started."
+    for job in jobs:
+        # A reported result counts as announced, so the job can be pruned once JOB_RETENTION_SECONDS pass.
+        if job.done:
+            job.announced = True
+    return "\n".join(job.describe() for job in jobs)
+
+
+def wait_for_job(job_id, timeout=60):
+    """
+    Waits for a background job to finish and returns its result.
+
+    Parameters
+    ----------
+    job_id : str
+        The job ID returned when the job was started (e.g., 'job-1').
+    timeout : int, optional
+        Maximum number of seconds to wait (default 60).
+
+    Returns
+    -------
+    str
+        The job's result or error, or its current status if it is still running after the timeout.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return f"No job with ID '{job_id}'."
+    try:
+        job.future.result(timeout=float(timeout or 60))
+    except TimeoutError:
+        pass
+    if job.done:
+        job.announced = True
+    return job.describe()
+
+
+def pop_finished_jobs():
+    """
+    Return jobs that finished since the last call and have not been reported yet.
+
+    Used by the CLI to announce completed background work between prompts.
+    """
+    finished = [job for job in _visible_jobs() if job.done and not job.announced]
+    with _lock:
+        for job in finished:
+            job.announced = True
+    return finished
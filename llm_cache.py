@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from chat_client import ChatClientWrapper
+from tool_cache import MUTATING_TOOLS
+
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_MAX_MB = float(os.environ.get("LLM_CACHE_MAX_MB", "100"))
+
+
+def cache_key(params):
+    """
+    Hash the parts of a chat completion request that determine the response.
+
+    Swarm puts the agent's instructions in the leading system message, so the
+    key covers the model, instructions, tool schemas and the full message list.
+    """
+    relevant = {
+        "model": params.get("model"),
+        "messages": params.get("messages"),
+        "tools": params.get("tools"),
+        "tool_choice": params.get("tool_choice"),
+        "parallel_tool_calls": params.get("parallel_tool_calls"),
+        "stream": bool(params.get("stream")),
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def follows_mutating_call(messages):
+    """Return True if a mutating tool was called since the last user message."""
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            return False
+        if message.get("role") == "tool" and message.get("tool_name") in MUTATING_TOOLS:
+            return True
+        for tool_call in message.get("tool_calls") or []:
+            if tool_call.get("function", {}).get("name") in MUTATING_TOOLS:
+                return True
+    return False
+
+
+class ResponseStore:
+    """
+    An on-disk SQLite store of completion responses with size-based LRU eviction.
+
+    Parameters
+    ----------
+    path : str
+        The SQLite database file.
+    max_bytes : int
+        Total size of stored responses; least recently used entries are evicted beyond it.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        body = json.dumps(value)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, body, len(body), time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachingClient(ChatClientWrapper):
+    """
+    Wrap an OpenAI client so repeated chat completions are answered from disk.
+
+    Drop-in for the client passed to `Swarm(client=...)`: only
+    `chat.completions.create` is intercepted. Both streaming and non-streaming
+    responses are cached; a cached stream is replayed chunk by chunk. Turns in
+    which a mutating tool (see tool_cache.MUTATING_TOOLS) has already run are
+    never served from or written to the cache.
+
+    Parameters
+    ----------
+    client : openai.OpenAI
+        The client that serves cache misses.
+    store : ResponseStore, optional
+        Where responses are kept. Defaults to a store at LLM_CACHE_PATH.
+    """
+
+    def __init__(self, client, store=None):
+        super().__init__(client)
+        self.store = store or ResponseStore()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def _create(self, params):
+        if follows_mutating_call(params.get("messages")):
+            self.bypassed += 1
+            return self.client.chat.completions.create(**params)
+
+        key = cache_key(params)
+        cached = self.store.get(key)
+        if cached is not None:
+            self.hits += 1
+            if params.get("stream"):
+                return (ChatCompletionChunk.model_validate(chunk) for chunk in cached)
+            return ChatCompletion.model_validate(cached)
+
+        self.misses += 1
+        response = self.client.chat.completions.create(**params)
+        if params.get("stream"):
+            return self._record_stream(key, response)
+        self.store.put(key, response.model_dump(mode="json"))
+        return response
+
+    def _record_stream(self, key, stream):
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk.model_dump(mode="json"))
+            yield chunk
+        # Only complete streams are stored; an interrupted one is simply not cached.
+        self.store.put(key, chunks)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed}
@@ -0,0 +1,212 @@
+from collections import OrderedDict
+import functools
+import itertools
+import json
+import os
+import threading
+
+import jobs
+
+
+# Default maximum characters of a tool result sent to the model in one go.
+TOOL_OUTPUT_MAX_CHARS = int(os.environ.get("TOOL_OUTPUT_MAX_CHARS", "1500"))
+
+# Per-tool overrides of TOOL_OUTPUT_MAX_CHARS.
+TOOL_OUTPUT_BUDGETS = {
+    "get_ec2_info": 2000,
+    "get_ec2_inventory": 2000,
+}
+
+# Number of full results kept for paging per session; the oldest are dropped first.
+OUTPUT_STORE_SIZE = int(os.environ.get("TOOL_OUTPUT_STORE_SIZE", "50"))
+
+# Stored results per server session (None in the CLI), so sessions neither see nor evict each other's.
+_stores = {}
+_store_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+def _to_text(result):
+    if isinstance(result, str):
+        return result
+    return json.dumps(result, default=str, separators=(",", ":"))
+
+
+def _tabulate(lines):
+    """
+    Turn lines like 'Instance ID: i-1, Type: t2.micro' into a header row plus value rows.
+
+    Returns None if the lines do not all share the same labels.
+    """
+    header = None
+    rows = []
+    for line in lines:
+        pairs = [field.partition(": ") for field in line.split(", ")]
+        if any(not sep for _, sep, _ in pairs):
+            return None
+        labels = [label for label, _, _ in pairs]
+        if header is None:
+            header = labels
+        elif labels != header:
+            return None
+        rows.append(" | ".join(value for _, _, value in pairs))
+    if header is None:
+        return None
+    return [" | ".join(header)] + rows
+
+
+def _compact_lines(text):
+    """Return (lines, table_header); table_header is None unless the lines were tabulated."""
+    lines = text.splitlines()
+    body = [line for line in lines if ": " in line]
+    # Lines without labels (e.g., a next_token hint) are kept after the table.
+    notes = [line for line in lines if ": " not in line]
+    if len(body) > 1:
+        table = _tabulate(body)
+        if table is not None and sum(map(len, table)) < sum(map(len, body)):
+            return table + notes, table[0]
+    return lines, None
+
+
+def _paginate(lines, budget, header=None):
+    """
+    Fill pages of at most `budget` characters with `lines`.
+
+    A line that does not fit on the current page starts the next one; only
+    a line longer than a whole page is split, filling the page it starts on.
+    Pages after the first leave room for the table header repeated on them.
+    Returns a list of (first_line, last_line, text), with 1-based line numbers.
+    """
+    continued_limit = budget if header is None else max(1, budget - len(header) - 1)
+    pages = []
+    chunks, used, first = [], 0, 1
+    for number, line in enumerate(lines, start=1):
+        while True:
+            if not chunks:
+                first = number
+            space = (continued_limit if pages else budget) - used
+            if len(line) <= space:
+                chunks.append(line)
+                used += len(line) + 1
+                break
+            if chunks and len(line) <= continued_limit:
+                # The line fits on a page of its own, so it is not broken up.
+                pages.append((first, number - 1, "\n".join(chunks)))
+                chunks, used = [], 0
+                continue
+            if space > 0:
+                chunks.append(line[:space])
+                line = line[space:]
+            pages.append((first, number, "\n".join(chunks)))
+            chunks, used = [], 0
+    if chunks:
+        pages.append((first, len(lines), "\n".join(chunks)))
+    return pages
+
+
+def _store_result(header, pages, line_count):
+    output_id = f"out-{next(_ids)}"
+    with _store_lock:
+        store = _stores.setdefault(jobs.current_session_id(), OrderedDict())
+        store[output_id] = (header, pages, line_count)
+        while len(store) > OUTPUT_STORE_SIZE:
+            store.popitem(last=False)
+    return output_id
+
+
+def drop_session_outputs(session_id):
+    """Forget the stored results of a session that has ended."""
+    with _store_lock:
+        _stores.pop(session_id, None)
+
+
+def _render(output_id, header, pages, index, line_count):
+    first, last, chunk = pages[index]
+    # A table repeats its header on every page so the columns stay readable.
+    if header is not None and index > 0:
+        chunk = header + "\n" + chunk
+    note = f"[Showing lines {first}-{last} of {line_count}."
+    if index + 1 < len(pages):
+        note += f" Call get_more_output('{output_id}:{index + 1}') for more.]"
+    else:
+        note += " End of output.]"
+    return chunk + "\n" + note
+
+
+def budgeted_tool(func, max_chars=None):
+    """
+    Wrap a tool so its result never exceeds an output budget when sent to the model.
+
+    Oversized text or JSON results are compacted (repetitive 'Label: value'
+    lines become a table) and, if still too large, the full result is kept in
+    a local store and only the first page is returned together with a
+    continuation token for get_more_output. Agent handoffs and other non-data
+    results pass through untouched. The wrapper keeps the tool's name and
+    signature.
+
+    Parameters
+    ----------
+    func : callable
+        The tool to wrap.
+    max_chars : int, optional
+        The budget. Defaults to the tool's entry in TOOL_OUTPUT_BUDGETS, then TOOL_OUTPUT_MAX_CHARS.
+    """
+    if getattr(func, "__budgeted__", False):
+        return func
+    budget = max_chars or TOOL_OUTPUT_BUDGETS.get(func.__name__, TOOL_OUTPUT_MAX_CHARS)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if not isinstance(result, (str, dict, list)):
+            return result
+
+        text = _to_text(result)
+        if len(text) <= budget:
+            return result
+
+        if not isinstance(result, str):
+            # One JSON value per line, so large dicts and lists can be paged.
+            text = json.dumps(result, default=str, indent=1)
+        lines, header = _compact_lines(text)
+        compact = "\n".join(lines)
+        if len(compact) <= budget:
+            return compact
+
+        pages = _paginate(lines, budget, header)
+        output_id = _store_result(header, pages, len(lines))
+        return _render(output_id, header, pages, 0, len(lines))
+
+    wrapper.__budgeted__ = True
+    wrapper.budget = budget
+    return wrapper
+
+
+def get_more_output(continuation_token):
+    """
+    Returns the next page of a tool result that was too large to show at once.
+
+    Parameters
+    ----------
+    continuation_token : str
+        The token from the previous page (e.g., 'out-3:1').
+
+    Returns
+    -------
+    str
+        The next page of the stored output, with a token for the page after it if there is one.
+    """
+    output_id, _, start = str(continuation_token).strip().strip("'\"").partition(":")
+    with _store_lock:
+        stored = _stores.get(jobs.current_session_id(), {}).get(output_id)
+    if stored is None:
+        return f"No stored output for '{continuation_token}'. It may have expired; call the original tool again."
+
+    header, pages, line_count = stored
+    try:
+        index = int(start or 0)
+    except ValueError:
+        return f"Invalid continuation token '{continuation_token}'."
+    if index >= len(pages):
+        return "End of output."
+    return _render(output_id, header, pages, index, line_count)
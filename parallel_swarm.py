@@ -0,0 +1,140 @@
+from concurrent.futures import Future, TimeoutError
+import contextvars
+import json
+import os
+import threading
+import time
+
+from swarm import Swarm
+from swarm.types import Response
+
+
+PARALLEL_TOOL_CALLS = os.environ.get("PARALLEL_TOOL_CALLS", "true").lower() in ("1", "true", "yes")
+# Tool calls from one assistant message running at once.
+TOOL_MAX_WORKERS = int(os.environ.get("TOOL_MAX_WORKERS", "8"))
+# Seconds a tool call may run before the turn stops waiting for it.
+TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", "120"))
+
+# Per-tool overrides of TOOL_TIMEOUT.
+TOOL_TIMEOUTS = {
+    "wait_for_job": 900,
+    "upload_file_to_s3": 3600,
+    "upload_files_to_s3": 3600,
+}
+
+CONTEXT_VARIABLES = "context_variables"
+
+
+def _start_calls(calls, max_workers):
+    """
+    Run `(func, kwargs)` calls on up to `max_workers` daemon threads and return one Future per call.
+
+    Daemon threads (unlike ThreadPoolExecutor's) do not keep the process
+    alive at exit, so an abandoned, hung call cannot block shutdown. Each
+    call runs in a copy of the caller's context so its trace spans nest
+    under the caller's.
+    """
+    work = [(Future(), contextvars.copy_context(), func, kwargs) for func, kwargs in calls]
+    queue = iter(work)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                item = next(queue, None)
+            if item is None:
+                return
+            future, context, func, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(context.run(func, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    for _ in range(max(1, min(max_workers, len(work)))):
+        threading.Thread(target=worker, name="tool", daemon=True).start()
+    return [future for future, _, _, _ in work]
+
+
+class ParallelSwarm(Swarm):
+    """
+    Swarm that runs the tool calls of one assistant message concurrently.
+
+    The tools are I/O-bound cloud calls, so independent calls (e.g., EC2
+    queries for several regions) overlap instead of queueing. Tool messages
+    are returned in the order the model issued the calls, and context
+    variable updates and handoffs are applied in that order too, so the last
+    handoff wins exactly as with sequential execution.
+
+    Every call, even a lone one, has a timeout (TOOL_TIMEOUTS, then
+    TOOL_TIMEOUT). A call that runs over is reported to the model as timed
+    out and left to finish in the background; it no longer holds up the
+    turn. A tool that raises is reported as an error message instead of
+    failing the whole turn.
+    """
+
+    def __init__(self, client=None, max_workers=None, timeout=None, parallel=None):
+        super().__init__(client)
+        self.max_workers = max_workers or TOOL_MAX_WORKERS
+        self.timeout = timeout or TOOL_TIMEOUT
+        self.parallel = PARALLEL_TOOL_CALLS if parallel is None else parallel
+
+    def _timeout_for(self, name):
+        return TOOL_TIMEOUTS.get(name, self.timeout)
+
+    def handle_tool_calls(self, tool_calls, functions, context_variables, debug):
+        if not self.parallel:
+            return super().handle_tool_calls(tool_calls, functions, context_variables, debug)
+
+        function_map = {f.__name__: f for f in functions}
+        partial_response = Response(messages=[], agent=None, context_variables={})
+
+        errors = {}
+        calls = []
+        for index, tool_call in enumerate(tool_calls):
+            name = tool_call.function.name
+            func = function_map.get(name)
+            if func is None:
+                errors[index] = f"Error: Tool {name} not found."
+                continue
+            try:
+                args = json.loads(tool_call.function.arguments or "{}")
+            except ValueError as e:
+                errors[index] = f"Error: Invalid arguments for {name}: {e}"
+                continue
+            if CONTEXT_VARIABLES in func.__code__.co_varnames:
+                args[CONTEXT_VARIABLES] = context_variables
+            calls.append((index, func, args))
+
+        futures = dict(zip([index for index, _, _ in calls],
+                           _start_calls([(func, args) for _, func, args in calls], self.max_workers)))
+        started = time.monotonic()
+
+        for index, tool_call in enumerate(tool_calls):
+            name = tool_call.function.name
+            result = None
+            error = errors.get(index)
+            if index in futures:
+                timeout = self._timeout_for(name)
+                try:
+                    raw_result = futures[index].result(timeout=max(0, started + timeout - time.monotonic()))
+                    result = self.handle_function_result(raw_result, debug)
+                except TimeoutError:
+                    # The call keeps running in the background; its result is discarded.
+                    error = f"Error: Tool {name} timed out after {timeout:g}s."
+                except Exception as e:
+                    error = f"Error: Tool {name} failed: {e}"
+
+            partial_response.messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "tool_name": name,
+                "content": error if error is not None else result.value,
+            })
+            if result is not None:
+                partial_response.context_variables.update(result.context_variables)
+                if result.agent:
+                    partial_response.agent = result.agent
+
+        return partial_response
@@ -0,0 +1,183 @@
+from collections import deque
+from contextlib import contextmanager
+import contextvars
+import os
+import queue
+import threading
+import time
+
+
+# Seconds between deliveries of coalesced progress updates to the stream.
+PROGRESS_INTERVAL = float(os.environ.get("PROGRESS_INTERVAL", "0.5"))
+# Seconds between status checks of a long-running operation (e.g., an Azure poller).
+PROGRESS_POLL_SECONDS = float(os.environ.get("PROGRESS_POLL_SECONDS", "2"))
+# One-off events held for delivery at once; the oldest are dropped beyond it.
+PROGRESS_MAX_PENDING = 200
+
+# Callbacks receiving the events emitted in the current context.
+_listeners = contextvars.ContextVar("progress_listeners", default=())
+
+
+def emit(message, key=None, **fields):
+    """
+    Report progress of the running tool.
+
+    Never blocks and never raises: with no listener the event is dropped.
+    Events sharing a `key` (e.g., one upload's byte count) are coalesced, so
+    only the latest one is delivered per PROGRESS_INTERVAL.
+
+    Parameters
+    ----------
+    message : str
+        A one-line, human-readable status.
+    key : str, optional
+        Identifies a stream of updates to the same operation.
+    **fields
+        Extra JSON-serialisable details (e.g., done=True, transferred, total).
+    """
+    _deliver(_listeners.get(), message, key, fields)
+
+
+def _deliver(listeners, message, key, fields):
+    if not listeners:
+        return
+    event = dict(fields, message=message, key=key, time=time.time())
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception:
+            pass
+
+
+def bound_emit():
+    """
+    Return an `emit` function bound to the current context's listeners.
+
+    For callbacks invoked on threads that do not inherit the tool's context,
+    such as boto3's transfer threads.
+    """
+    listeners = _listeners.get()
+
+    def emit_bound(message, key=None, **fields):
+        _deliver(listeners, message, key, fields)
+
+    return emit_bound
+
+
+@contextmanager
+def listen(callback):
+    """Call `callback(event)` for every event emitted in this context, including threads started from it."""
+    token = _listeners.set(_listeners.get() + (callback,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
+def wait_for(poller, label):
+    """
+    Wait for an Azure long-running operation, reporting its status every PROGRESS_POLL_SECONDS.
+
+    The updates are keyed by `label`; report the outcome with the same key
+    and done=True to close them. Returns the poller's result.
+    """
+    while not poller.done():
+        emit(f"{label}: {poller.status()}", key=label)
+        poller.wait(timeout=PROGRESS_POLL_SECONDS)
+    return poller.result()
+
+
+class ProgressChannel:
+    """
+    Collects emitted events and hands them out in throttled batches.
+
+    Keyed events replace the pending event with the same key; one-off events
+    queue in order. `put` only takes a lock, so emitting tools never wait on
+    the reader.
+    """
+
+    def __init__(self, interval=None, max_pending=PROGRESS_MAX_PENDING):
+        self.interval = PROGRESS_INTERVAL if interval is None else interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._order = deque(maxlen=max_pending)
+        self._last_drain = 0.0
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, event):
+        with self._lock:
+            if self.closed:
+                return
+            key = event.get("key")
+            if key is not None and key in self._pending:
+                self._pending[key] = event
+                self.dropped += 1
+                return
+            if len(self._order) == self._order.maxlen:
+                self._pending.pop(self._order[0], None)
+                self.dropped += 1
+            slot = key if key is not None else object()
+            self._pending[slot] = event
+            self._order.append(slot)
+
+    def drain(self, force=False):
+        """Return the pending events in emission order, unless the last drain was less than `interval` ago."""
+        with self._lock:
+            now = time.monotonic()
+            if not self._order or (not force and now - self._last_drain < self.interval):
+                return []
+            self._last_drain = now
+            events = [self._pending.pop(slot) for slot in self._order]
+            self._order.clear()
+        return events
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+
+
+def with_progress(stream, interval=None):
+    """
+    Yield the chunks of a Swarm stream with ``{"progress": event}`` chunks merged in.
+
+    The stream is consumed on a producer thread that listens for progress,
+    so events from tools (and the threads they start) reach the reader while
+    a tool is still running, instead of only after its result arrives. While
+    a tool runs, progress is delivered at most once per `interval` seconds,
+    coalesced per key; pending events are flushed ahead of the next chunk.
+    """
+    channel = ProgressChannel(interval)
+    items = queue.Queue()
+    done = object()
+
+    def produce():
+        try:
+            with listen(channel.put):
+                for chunk in stream:
+                    items.put(chunk)
+        except BaseException as e:
+            items.put(e)
+        finally:
+            items.put(done)
+
+    # The producer runs in a copy of this context so the turn's trace spans stay its parents.
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(produce,), name="stream", daemon=True).start()
+
+    while True:
+        try:
+            item = items.get(timeout=max(channel.interval, 0.05))
+        except queue.Empty:
+            item = None
+        # Events pending when a chunk arrives were emitted before it, so they go out first.
+        for event in channel.drain(force=item is not None):
+            yield {"progress": event}
+        if item is done:
+            channel.close()
+            return
+        if isinstance(item, BaseException):
+            channel.close()
+            raise item
+        if item is not None:
+            yield item
@@ -0,0 +1,99 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextvars
+import time
+
+from tracing import span
+
+
+# A provisioning step: `run` is called with a dict of the results of `depends_on`.
+Step = namedtuple("Step", ["name", "depends_on", "run"])
+
+
+class ProvisioningError(Exception):
+    """Raised when a step fails; carries the results and timings of the steps that finished."""
+
+    def __init__(self, step, error, results, timings):
+        super().__init__(f"Step '{step}' failed: {error}")
+        self.step = step
+        self.error = error
+        self.results = results
+        self.timings = timings
+
+
+def run_steps(steps, max_workers=4):
+    """
+    Run provisioning steps as a dependency graph.
+
+    Every step starts as soon as all of its dependencies have finished, so
+    independent chains (e.g., a public IP and a VNet -> subnet chain) run at
+    the same time. If a step fails, no new steps are started and a
+    ProvisioningError is raised once the steps already running have finished.
+
+    Parameters
+    ----------
+    steps : list
+        The Step tuples to run. Dependencies must name other steps in the list.
+    max_workers : int, optional
+        Maximum number of steps running at once.
+
+    Returns
+    -------
+    tuple
+        (results, timings): dicts keyed by step name, holding each step's return
+        value and its duration in seconds.
+    """
+    steps = {step.name: step for step in steps}
+    for step in steps.values():
+        unknown = set(step.depends_on) - set(steps)
+        if unknown:
+            raise ValueError(f"Step '{step.name}' depends on unknown steps: {', '.join(sorted(unknown))}")
+
+    results = {}
+    timings = {}
+    pending = dict(steps)
+    running = {}
+    failure = None
+
+    def timed(step, inputs):
+        start = time.perf_counter()
+        try:
+            with span(step.name, kind="step"):
+                return step.run(inputs)
+        finally:
+            timings[step.name] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            if failure is None:
+                ready = [s for s in pending.values() if all(d in results for d in s.depends_on)]
+                for step in ready:
+                    del pending[step.name]
+                    inputs = {d: results[d] for d in step.depends_on}
+                    # Each step runs in a copy of the caller's context so its spans nest under the caller's.
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, timed, step, inputs)] = step.name
+
+            if not running:
+                if failure is None:
+                    raise ValueError(f"Dependency cycle between steps: {', '.join(sorted(pending))}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    if failure is None:
+                        failure = (name, e)
+
+    if failure is not None:
+        raise ProvisioningError(failure[0], failure[1], results, timings)
+    return results, timings
+
+
+def format_timings(timings, wall_time):
+    """Format per-step timings and the end-to-end wall time as one line."""
+    steps = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items())
+    return f"total {wall_time:.1f}s ({steps})"
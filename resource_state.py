@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+RESOURCE_STATE_ENABLED = os.environ.get("RESOURCE_STATE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESOURCE_STATE_PATH = os.environ.get("RESOURCE_STATE_PATH", ".resource_state.sqlite3")
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def fingerprint(spec):
+    """Hash a resource's requested properties; equal specs give equal fingerprints."""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResourceState:
+    """
+    A persistent index of the cloud resources provisioned by the tools.
+
+    Each entry is keyed by the resource's identity (e.g.,
+    'azure/<subscription>/<group>/virtualNetworks/<name>') and holds the
+    fingerprint of the spec it was created with, its ID once known, and an
+    idempotency token for APIs that take one. The cloud stays the source of
+    truth: an entry only says what was asked for, so callers still check
+    that the resource exists before skipping its creation.
+
+    Parameters
+    ----------
+    path : str
+        The SQLite database file.
+    """
+
+    def __init__(self, path=RESOURCE_STATE_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resources ("
+            "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, resource_id TEXT, token TEXT, updated REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        """
+        Return the entry for `key` as a dict with fingerprint, resource_id and token, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, resource_id, token FROM resources WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "resource_id": row[1], "token": row[2]}
+
+    def record(self, key, fingerprint, resource_id=None, token=None):
+        """Store or replace the entry for `key`."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO resources (key, fingerprint, resource_id, token, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, fingerprint, resource_id, token, time.time()),
+            )
+            self._db.commit()
+
+    def forget(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM resources WHERE key = ?", (key,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def get_state():
+    """Return the shared ResourceState, opening it on first use, or None if RESOURCE_STATE_ENABLED is off."""
+    global _state
+
+    if not RESOURCE_STATE_ENABLED:
+        return None
+    with _state_lock:
+        if _state is None:
+            _state = ResourceState()
+        return _state
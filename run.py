@@ -1,13 +1,41 @@
 from agents import routerAgent
+import api_scheduler
+import argparse
+import asyncio
+import atexit
+import fast_router
+from jobs import pop_finished_jobs
+from llm_cache import LLM_CACHE_ENABLED, CachingClient
 from openai import OpenAI
 import json
-from swarm import Swarm
+import os
+from parallel_swarm import ParallelSwarm
+import progress
+from sessions import Session
+import tool_cache
+import tracing
+
+# Any OpenAI-compatible server works, e.g. a remote Ollama or the benchmarks' fake server.
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434/v1")
 
 ollama_client = OpenAI(
-    base_url="http://localhost:11434/v1",        
+    base_url=OLLAMA_BASE_URL,
     api_key="ollama"            
 )
 
+
+def make_swarm_client(llm_client=ollama_client):
+    """
+    Build the Swarm client around an OpenAI-compatible client.
+
+    Repeated prompts are optionally answered from the on-disk response cache,
+    and every completion is recorded as a trace span (time to first token,
+    total time, tokens). The tool calls of one model message run concurrently.
+    """
+    if LLM_CACHE_ENABLED:
+        llm_client = CachingClient(llm_client)
+    return ParallelSwarm(client=tracing.TracingClient(llm_client))
+
 def process_and_print_streaming_response(response):
     """Process and print the output from a streaming response.
 
@@ -19,6 +47,8 @@ def process_and_print_streaming_response(response):
     - content: prints the content as part of the conversation
     - tool_calls: prints the tool calls with function name and arguments
     - delim: prints a newline when the delimiter is "end"
+    - progress: prints a tool's progress event; successive updates to the same
+      operation (same key) overwrite one line
     - response: returns the response when found
 
     :param response: a generator of response chunks
@@ -27,8 +57,26 @@ def process_and_print_streaming_response(response):
     
     content = ""
     last_sender = ""
+    progress_key = None
 
     for chunk in response:
+        if "progress" in chunk:
+            event = chunk["progress"]
+            if progress_key is not None and event.get("key") == progress_key:
+                print(f"\r[progress] {event['message']}\033[K", end="", flush=True)
+            else:
+                if progress_key is not None or content:
+                    print()
+                print(f"[progress] {event['message']}", end="", flush=True)
+            progress_key = event.get("key") if not event.get("done") else None
+            if progress_key is None:
+                print()
+            continue
+
+        if progress_key is not None:
+            print()
+            progress_key = None
+
         if "sender" in chunk:
             last_sender = chunk["sender"]
 
@@ -110,41 +158,79 @@ def run_demo_loop(
     blue, and any tool calls in purple. If the client returns a response with
     multiple messages, the demo loop will print each message individually.
     """
-    client = Swarm(client=ollama_client)
+    client = make_swarm_client()
     print("Starting Ollama Swarm CLI:")
 
-    messages = []
-    agent = starting_agent
+    session = Session(starting_agent)
 
     while True:
 
         try:
+            # Background jobs keep running between prompts; announce the ones that finished.
+            for job in pop_finished_jobs():
+                print(f"[background] {job.describe()}")
+
             print("-"*30)
             user_input = input("User: ")
             print("-"*30)
-            messages.append({"role": "user", "content": user_input})
-
-            response = client.run(
-                agent=agent,
-                messages=messages,
-                context_variables=context_variables or {},
-                stream=stream,
-                debug=debug,
-            )
 
-            print("PLEASE WAIT! PROCESSING YOUR INPUT...")
-
-            if stream:
-                response = process_and_print_streaming_response(response)
-            else:
-                pretty_print_messages(response.messages)
-
-            messages.extend(response.messages)
-            agent = response.agent
+            # Unambiguous requests skip the LLM router; the history is compacted to its token budget.
+            agent, tokens_before, tokens_after = session.start_turn(user_input)
+            if tokens_after < tokens_before:
+                print(f"[history] compacted {tokens_before} -> {tokens_after} tokens "
+                      f"(saved {tokens_before - tokens_after}, {session.history.tokens_saved} this session)")
+
+            # One trace per turn: LLM calls, handoffs, tool calls and cloud API calls nest under it.
+            with tracing.span("turn", kind="turn", agent=agent.name) as turn:
+                response = client.run(
+                    agent=agent,
+                    messages=session.history.messages,
+                    context_variables=context_variables or {},
+                    stream=stream,
+                    debug=debug,
+                )
+
+                print("PLEASE WAIT! PROCESSING YOUR INPUT...")
+
+                if stream:
+                    # Tools' progress events are shown live, merged into the stream.
+                    response = process_and_print_streaming_response(progress.with_progress(response))
+                else:
+                    pretty_print_messages(response.messages)
+                turn.set(final_agent=response.agent.name, messages=len(response.messages))
+
+            session.finish_turn(response)
 
         except Exception as e:
             print(f"Something went wrong. Error: {e}")
             return
 
 if __name__ == "__main__":
-    run_demo_loop(routerAgent, stream=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ollama Swarm CLI")
+    parser.add_argument("--profile", action="store_true",
+                        help="print where the time went (LLM, handoffs, tools, cloud API calls) on exit")
+    parser.add_argument("--trace-file", default=tracing.TRACE_FILE,
+                        help="append every span to this JSONL file (default: $TRACE_FILE)")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve many concurrent sessions over HTTP instead of the interactive prompt")
+    parser.add_argument("--host", help="address to serve on (default: $SERVER_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="port to serve on (default: $SERVER_PORT or 8080)")
+    args = parser.parse_args()
+
+    if args.trace_file:
+        tracing.configure(args.trace_file)
+    if args.profile:
+        atexit.register(lambda: print("\n" + tracing.profile_summary() + "\n" + api_scheduler.format_stats()
+                                      + "\n" + tool_cache.format_stats() + "\n" + fast_router.format_stats()))
+
+    if args.serve:
+        from server import ConcurrencyLimitedClient, serve
+
+        # Sessions share one pooled model client, limited to LLM_MAX_CONCURRENCY completions at once.
+        limiter = ConcurrencyLimitedClient(ollama_client)
+        try:
+            asyncio.run(serve(make_swarm_client(limiter), limiter, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        run_demo_loop(routerAgent, stream=True)
\ No newline at end of file
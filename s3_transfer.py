@@ -0,0 +1,312 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+import progress
+
+
+MB = 1024 * 1024
+
+# Transfer settings used when a tool call does not override them.
+MULTIPART_THRESHOLD_MB = int(os.environ.get("S3_MULTIPART_THRESHOLD_MB", "8"))
+MULTIPART_CHUNK_MB = int(os.environ.get("S3_MULTIPART_CHUNK_MB", "8"))
+MAX_CONCURRENCY = int(os.environ.get("S3_MAX_CONCURRENCY", "8"))
+
+# Where in-progress multipart uploads are recorded so they can be resumed.
+UPLOAD_STATE_DIR = os.environ.get("S3_UPLOAD_STATE_DIR", ".upload_state")
+
+# S3 requires every part except the last to be at least 5 MB.
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+
+
+class UploadProgress:
+    """
+    boto3-style progress callback that emits a throttled progress event.
+
+    Called with the number of bytes transferred since the previous call; safe
+    to call from several upload threads at once, including threads that do
+    not share the creating tool's context.
+    """
+
+    def __init__(self, label, total, interval=0.5):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.transferred = 0
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+        self._emit = progress.bound_emit()
+
+    def __call__(self, bytes_amount):
+        with self._lock:
+            self.transferred += bytes_amount
+            now = time.monotonic()
+            done = self.transferred >= self.total
+            if not done and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+            percent = 100.0 * self.transferred / self.total if self.total else 100.0
+            self._emit(f"Uploading {self.label}: {self.transferred / MB:.1f}/{self.total / MB:.1f} MB ({percent:.0f}%)",
+                       key=f"upload:{self.label}", transferred=self.transferred, total=self.total, done=done)
+
+
+def transfer_config(chunk_size_mb=None, max_concurrency=None):
+    """
+    Build a boto3 TransferConfig from explicit values or the module settings.
+
+    Parameters
+    ----------
+    chunk_size_mb : int, optional
+        Multipart chunk size in MB.
+    max_concurrency : int, optional
+        Number of parts uploaded in parallel.
+
+    Returns
+    -------
+    boto3.s3.transfer.TransferConfig
+        The transfer configuration.
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=MULTIPART_THRESHOLD_MB * MB,
+        multipart_chunksize=int(chunk_size_mb or MULTIPART_CHUNK_MB) * MB,
+        max_concurrency=int(max_concurrency or MAX_CONCURRENCY),
+        use_threads=True,
+    )
+
+
+def _part_size(file_size, chunk_size):
+    # Grow the chunk if the file would otherwise need more than S3's part limit.
+    chunk_size = max(chunk_size, MIN_PART_SIZE)
+    while file_size > chunk_size * MAX_PARTS:
+        chunk_size *= 2
+    return chunk_size
+
+
+def _state_path(file_path, bucket, key):
+    digest = hashlib.sha1(f"{os.path.abspath(file_path)}\0{bucket}\0{key}".encode()).hexdigest()
+    return os.path.join(UPLOAD_STATE_DIR, f"{digest}.json")
+
+
+def _load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _remote_parts(s3_client, bucket, key, upload_id):
+    parts = {}
+    paginator = s3_client.get_paginator("list_parts")
+    for page in paginator.paginate(Bucket=bucket, Key=key, UploadId=upload_id):
+        for part in page.get("Parts", []):
+            parts[str(part["PartNumber"])] = {"ETag": part["ETag"], "Size": part["Size"]}
+    return parts
+
+
+def _abort_upload(s3_client, state):
+    # Parts of an upload that is neither completed nor aborted are kept, and billed, by S3.
+    try:
+        s3_client.abort_multipart_upload(Bucket=state["bucket"], Key=state["key"], UploadId=state["upload_id"])
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+            raise
+
+
+def resumable_upload(s3_client, file_path, bucket, key, chunk_size_mb=None, max_concurrency=None, callback=None):
+    """
+    Upload a large file with a parallel multipart upload that can be resumed.
+
+    The upload ID and every completed part are recorded in UPLOAD_STATE_DIR.
+    If a previous attempt for the same file, bucket and key was interrupted,
+    the parts S3 already has are kept and only the missing ones are sent.
+
+    Parameters
+    ----------
+    s3_client : botocore.client.S3
+        The S3 client to upload with.
+    file_path : str
+        Path of the local file.
+    bucket : str
+        Destination bucket.
+    key : str
+        Destination object key.
+    chunk_size_mb : int, optional
+        Part size in MB. Defaults to S3_MULTIPART_CHUNK_MB.
+    max_concurrency : int, optional
+        Number of parts uploaded in parallel. Defaults to S3_MAX_CONCURRENCY.
+    callback : callable, optional
+        Called with the number of bytes uploaded, as boto3's Callback.
+
+    Returns
+    -------
+    dict
+        The CompleteMultipartUpload response, plus 'ResumedParts' with the number of parts reused.
+    """
+    file_stat = os.stat(file_path)
+    part_size = _part_size(file_stat.st_size, int(chunk_size_mb or MULTIPART_CHUNK_MB) * MB)
+    part_count = max(1, -(-file_stat.st_size // part_size))
+    state_path = _state_path(file_path, bucket, key)
+
+    state = _load_state(state_path)
+    # A changed file or chunk size means the recorded parts no longer line up.
+    if state is not None and (state.get("size"), state.get("mtime"), state.get("part_size")) != (
+            file_stat.st_size, file_stat.st_mtime, part_size):
+        _abort_upload(s3_client, state)
+        state = None
+    if state is not None:
+        try:
+            state["parts"] = _remote_parts(s3_client, bucket, key, state["upload_id"])
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                raise
+            _abort_upload(s3_client, state)
+            state = None
+
+    if state is None:
+        response = s3_client.create_multipart_upload(Bucket=bucket, Key=key)
+        state = {
+            "upload_id": response["UploadId"],
+            "bucket": bucket,
+            "key": key,
+            "file": os.path.abspath(file_path),
+            "size": file_stat.st_size,
+            "mtime": file_stat.st_mtime,
+            "part_size": part_size,
+            "parts": {},
+        }
+        _save_state(state_path, state)
+
+    resumed = len(state["parts"])
+    if callback and resumed:
+        callback(sum(part["Size"] for part in state["parts"].values()))
+
+    state_lock = threading.Lock()
+
+    def upload_part(part_number):
+        offset = (part_number - 1) * part_size
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            body = f.read(part_size)
+        response = s3_client.upload_part(
+            Bucket=bucket, Key=key, UploadId=state["upload_id"], PartNumber=part_number, Body=body
+        )
+        with state_lock:
+            state["parts"][str(part_number)] = {"ETag": response["ETag"], "Size": len(body)}
+            _save_state(state_path, state)
+        if callback:
+            callback(len(body))
+
+    missing = [n for n in range(1, part_count + 1) if str(n) not in state["parts"]]
+    with ThreadPoolExecutor(max_workers=int(max_concurrency or MAX_CONCURRENCY)) as executor:
+        # list() re-raises the first failed part; completed parts stay recorded for the next attempt.
+        list(executor.map(upload_part, missing))
+
+    response = s3_client.complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=state["upload_id"],
+        MultipartUpload={
+            "Parts": [{"PartNumber": n, "ETag": state["parts"][str(n)]["ETag"]} for n in range(1, part_count + 1)]
+        },
+    )
+    os.remove(state_path)
+    response["ResumedParts"] = resumed
+    return response
+
+
+def upload_file(s3_client, file_path, bucket, key, chunk_size_mb=None, max_concurrency=None, callback=None):
+    """
+    Upload a file, using a resumable multipart upload above the multipart threshold.
+
+    Parameters
+    ----------
+    s3_client : botocore.client.S3
+        The S3 client to upload with.
+    file_path : str
+        Path of the local file.
+    bucket : str
+        Destination bucket.
+    key : str
+        Destination object key.
+    chunk_size_mb : int, optional
+        Part size in MB. Defaults to S3_MULTIPART_CHUNK_MB.
+    max_concurrency : int, optional
+        Number of parts uploaded in parallel. Defaults to S3_MAX_CONCURRENCY.
+    callback : callable, optional
+        Called with the number of bytes uploaded, as boto3's Callback.
+
+    Returns
+    -------
+    int
+        The number of parts reused from an interrupted upload (0 for a fresh upload).
+    """
+    if os.path.getsize(file_path) < MULTIPART_THRESHOLD_MB * MB:
+        s3_client.upload_file(
+            file_path, bucket, key, Config=transfer_config(chunk_size_mb, max_concurrency), Callback=callback
+        )
+        return 0
+
+    response = resumable_upload(s3_client, file_path, bucket, key, chunk_size_mb, max_concurrency, callback)
+    return response["ResumedParts"]
+
+
+def etag_part_size(file_size, chunk_size_mb=None):
+    """
+    Return the part size `upload_file` would use for a file of `file_size` bytes, or 0 for a single-part upload.
+
+    Together with the file's content this determines its S3 ETag.
+    """
+    if file_size < MULTIPART_THRESHOLD_MB * MB:
+        return 0
+    return _part_size(file_size, int(chunk_size_mb or MULTIPART_CHUNK_MB) * MB)
+
+
+def local_etag(file_path, chunk_size_mb=None):
+    """
+    Compute the ETag S3 will report for `file_path` once uploaded by `upload_file`.
+
+    Single-part uploads have the file's MD5 as ETag; multipart uploads have
+    the MD5 of the concatenated part MD5s followed by '-<part count>'.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the local file.
+    chunk_size_mb : int, optional
+        Part size in MB the file would be uploaded with. Defaults to S3_MULTIPART_CHUNK_MB.
+
+    Returns
+    -------
+    str
+        The quoted ETag, as returned by head_object.
+    """
+    part_size = etag_part_size(os.path.getsize(file_path), chunk_size_mb)
+    if not part_size:
+        md5 = hashlib.md5()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(MB), b""):
+                md5.update(block)
+        return f'"{md5.hexdigest()}"'
+
+    part_digests = []
+    with open(file_path, "rb") as f:
+        for part in iter(lambda: f.read(part_size), b""):
+            part_digests.append(hashlib.md5(part).digest())
+    return f'"{hashlib.md5(b"".join(part_digests)).hexdigest()}-{len(part_digests)}"'
@@ -0,0 +1,294 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+
+import api_scheduler
+from chat_client import ChatClientWrapper
+import fast_router
+import jobs
+import progress
+from sessions import SessionStore
+import tool_cache
+import tracing
+
+
+SERVER_HOST = os.environ.get("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "8080"))
+# Chat completions in flight at once across every session, so the model server is not oversubscribed.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "2"))
+# Turns running at once. Swarm is synchronous, so each turn runs on a worker thread.
+SERVER_MAX_TURNS = int(os.environ.get("SERVER_MAX_TURNS", "16"))
+MAX_REQUEST_BYTES = 1024 * 1024
+
+_REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found", 409: "Conflict",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ConcurrencyLimitedClient(ChatClientWrapper):
+    """
+    Wrap an OpenAI client so at most `max_concurrency` chat completions run at once.
+
+    Callers beyond the limit wait for a slot. A streamed completion keeps its
+    slot until the stream has been read to the end, since the model is busy
+    generating until then.
+    """
+
+    def __init__(self, client, max_concurrency=None):
+        super().__init__(client)
+        self.max_concurrency = max_concurrency or LLM_MAX_CONCURRENCY
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+
+    def _acquire(self):
+        with self._lock:
+            self.waiting += 1
+        self._slots.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def _create(self, params):
+        self._acquire()
+        try:
+            response = self.client.chat.completions.create(**params)
+        except Exception:
+            self._release()
+            raise
+        if params.get("stream"):
+            return self._release_after(response)
+        self._release()
+        return response
+
+    def _release_after(self, stream):
+        try:
+            yield from stream
+        finally:
+            self._release()
+
+    def stats(self):
+        with self._lock:
+            return {"max_concurrency": self.max_concurrency, "active": self.active, "waiting": self.waiting}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line.")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_REQUEST_BYTES:
+        raise HTTPError(413, f"Request body larger than {MAX_REQUEST_BYTES} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?")[0].rstrip("/") or "/", body
+
+
+def _head(status, content_type=None, chunked=False, length=None):
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", "Connection: close"]
+    if content_type:
+        lines.append(f"Content-Type: {content_type}")
+    if chunked:
+        lines.append("Transfer-Encoding: chunked")
+    elif length is not None:
+        lines.append(f"Content-Length: {length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _json_line(value):
+    return (json.dumps(value, default=str) + "\n").encode()
+
+
+class AgentServer:
+    """
+    Serve many independent agent conversations over HTTP.
+
+    Every session has its own history and active agent. The Swarm client and
+    its model, AWS and Azure clients are shared by all sessions. Turns stream
+    back as newline-delimited JSON, one chunk per line, in the order
+    process_and_print_streaming_response would print them.
+
+    Routes:
+
+    - ``POST /sessions`` starts a session.
+    - ``GET /sessions/<id>`` describes it; ``DELETE /sessions/<id>`` ends it.
+    - ``POST /sessions/<id>/messages`` with ``{"message": "...", "stream": true}``
+      runs a turn. Streamed turns include ``{"progress": ...}`` lines from
+      running tools and end with a ``{"response": ...}`` line.
+    - ``GET /health`` reports open sessions, LLM concurrency and cloud API
+      request, retry and throttling counters.
+    """
+
+    def __init__(self, swarm_client, limiter=None, sessions=None, max_turns=None):
+        self.client = swarm_client
+        self.limiter = limiter
+        self.sessions = sessions or SessionStore()
+        self.executor = ThreadPoolExecutor(max_workers=max_turns or SERVER_MAX_TURNS, thread_name_prefix="turn")
+
+    async def handle(self, reader, writer):
+        try:
+            request = await _read_request(reader)
+            if request is not None:
+                await self._route(*request, writer)
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            await self._send_json(writer, 500, {"error": str(e)})
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _send_json(self, writer, status, value=None):
+        body = b"" if value is None else _json_line(value)
+        writer.write(_head(status, "application/json" if body else None, length=len(body)) + body)
+        await writer.drain()
+
+    def _session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, f"No session with ID '{session_id}'.")
+        return session
+
+    async def _route(self, method, path, body, writer):
+        parts = path.strip("/").split("/")
+
+        if parts == ["health"] and method == "GET":
+            stats = self.limiter.stats() if self.limiter else None
+            return await self._send_json(writer, 200, {"sessions": len(self.sessions), "llm": stats,
+                                                       "api": api_scheduler.stats(),
+                                                       "tool_cache": tool_cache.cache_stats(),
+                                                       "routes": fast_router.route_stats()})
+
+        if parts == ["sessions"] and method == "POST":
+            try:
+                session = self.sessions.create()
+            except RuntimeError as e:
+                raise HTTPError(503, str(e))
+            return await self._send_json(writer, 201, session.describe())
+
+        if len(parts) == 2 and parts[0] == "sessions" and method == "GET":
+            return await self._send_json(writer, 200, self._session(parts[1]).describe())
+
+        if len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+            self._session(parts[1])
+            self.sessions.delete(parts[1])
+            return await self._send_json(writer, 204)
+
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages" and method == "POST":
+            return await self._post_message(self._session(parts[1]), body, writer)
+
+        raise HTTPError(404, f"No route for {method} {path}.")
+
+    async def _post_message(self, session, body, writer):
+        try:
+            request = json.loads(body or b"{}")
+            message = request["message"]
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError(400, 'Body must be JSON like {"message": "..."}.')
+        stream = bool(request.get("stream", True))
+
+        if not session.lock.acquire(blocking=False):
+            raise HTTPError(409, f"Session '{session.id}' is already running a turn.")
+
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        done = object()
+
+        def emit(chunk):
+            loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+
+        def run_turn():
+            try:
+                self._run_turn(session, message, stream, emit)
+            except Exception as e:
+                emit({"error": str(e)})
+            finally:
+                session.lock.release()
+                emit(done)
+
+        loop.run_in_executor(self.executor, run_turn)
+
+        if not stream:
+            result = None
+            while (chunk := await chunks.get()) is not done:
+                result = chunk
+            if "error" in result:
+                return await self._send_json(writer, 500, result)
+            return await self._send_json(writer, 200, result["response"])
+
+        # The turn runs to completion even if the client goes away, so the session stays consistent.
+        connected = True
+        writer.write(_head(200, "application/x-ndjson", chunked=True))
+        while (chunk := await chunks.get()) is not done:
+            if not connected:
+                continue
+            line = _json_line(chunk)
+            try:
+                writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+        if connected:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+    def _run_turn(self, session, message, stream, emit):
+        agent, tokens_before, tokens_after = session.start_turn(message)
+        if tokens_after < tokens_before:
+            emit({"history": {"tokens_before": tokens_before, "tokens_after": tokens_after}})
+
+        # Background jobs started in this turn belong to the session; other sessions cannot see them.
+        with jobs.session_scope(session.id), \
+                tracing.span("turn", kind="turn", agent=agent.name, session=session.id) as turn:
+            response = self.client.run(agent=agent, messages=session.history.messages, stream=stream)
+            if stream:
+                for chunk in progress.with_progress(response):
+                    if "response" in chunk:
+                        response = chunk["response"]
+                    else:
+                        emit(chunk)
+            turn.set(final_agent=response.agent.name, messages=len(response.messages))
+
+        session.finish_turn(response)
+        emit({"response": {"session_id": session.id, "agent": response.agent.name, "messages": response.messages}})
+
+
+async def serve(swarm_client, limiter=None, host=None, port=None):
+    """Run an AgentServer until cancelled; `limiter` is the ConcurrencyLimitedClient, reported by /health."""
+    server = AgentServer(swarm_client, limiter)
+    listener = await asyncio.start_server(server.handle, host or SERVER_HOST, port or SERVER_PORT)
+    address = listener.sockets[0].getsockname()
+    print(f"Serving agent sessions on http://{address[0]}:{address[1]}")
+    async with listener:
+        await listener.serve_forever()
@@ -0,0 +1,123 @@
+import os
+import secrets
+import threading
+import time
+
+from agents import routerAgent
+from conversation import ConversationHistory
+from fast_router import fast_route
+import jobs
+import output_budget
+
+
+# Sessions idle for longer than this many seconds are dropped by SessionStore.expire.
+SESSION_IDLE_TIMEOUT = float(os.environ.get("SESSION_IDLE_TIMEOUT", "3600"))
+SESSION_MAX_COUNT = int(os.environ.get("SESSION_MAX_COUNT", "1000"))
+
+
+class Session:
+    """
+    One conversation: its message history and the agent that handles the next turn.
+
+    A session runs one turn at a time; `lock` is held for the whole turn.
+    """
+
+    def __init__(self, starting_agent=routerAgent, session_id=None):
+        self.id = session_id or secrets.token_urlsafe(12)
+        self.history = ConversationHistory()
+        self.agent = starting_agent
+        self.lock = threading.Lock()
+        self.turns = 0
+        self.last_active = time.monotonic()
+
+    def start_turn(self, user_input):
+        """
+        Record the user's message and pick the agent for the turn.
+
+        Unambiguous requests skip the LLM router, and the history is compacted
+        to its token budget before it is sent.
+
+        Returns
+        -------
+        tuple
+            (agent, tokens_before, tokens_after): the agent to run and the
+            estimated history size before and after compaction.
+        """
+        self.last_active = time.monotonic()
+        self.history.append({"role": "user", "content": user_input})
+        if self.agent is routerAgent:
+            self.agent = fast_route(user_input) or self.agent
+        tokens_before, tokens_after = self.history.compact(self.agent.name)
+        return self.agent, tokens_before, tokens_after
+
+    def finish_turn(self, response):
+        """Append the turn's messages and hand the session to the agent the turn ended with."""
+        self.history.extend(response.messages)
+        self.agent = response.agent
+        self.turns += 1
+        self.last_active = time.monotonic()
+
+    def describe(self):
+        return {
+            "session_id": self.id,
+            "agent": self.agent.name,
+            "turns": self.turns,
+            "messages": len(self.history.messages),
+            "history_tokens": self.history.token_count(),
+        }
+
+
+class SessionStore:
+    """A thread-safe registry of sessions that drops idle ones."""
+
+    def __init__(self, idle_timeout=None, max_sessions=None):
+        self.idle_timeout = idle_timeout or SESSION_IDLE_TIMEOUT
+        self.max_sessions = max_sessions or SESSION_MAX_COUNT
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, starting_agent=routerAgent):
+        """
+        Start a new session.
+
+        Raises
+        ------
+        RuntimeError
+            If SESSION_MAX_COUNT sessions are already open.
+        """
+        self.expire()
+        session = Session(starting_agent)
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise RuntimeError(f"Too many open sessions ({self.max_sessions}).")
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def delete(self, session_id):
+        with self._lock:
+            deleted = self._sessions.pop(session_id, None) is not None
+        if deleted:
+            jobs.drop_session_jobs(session_id)
+            output_budget.drop_session_outputs(session_id)
+        return deleted
+
+    def expire(self):
+        """Drop sessions idle for longer than the timeout, unless a turn is running. Returns how many were dropped."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [s.id for s in self._sessions.values() if s.last_active < cutoff and not s.lock.locked()]
+            for session_id in idle:
+                del self._sessions[session_id]
+        # An ended session's background jobs and paged results can no longer be asked about.
+        for session_id in idle:
+            jobs.drop_session_jobs(session_id)
+            output_budget.drop_session_outputs(session_id)
+        return len(idle)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,201 @@
+from collections import OrderedDict
+import functools
+import inspect
+import os
+import threading
+import time
+
+
+TOOL_CACHE_ENABLED = os.environ.get("TOOL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+# Names of tools decorated with `invalidates`, i.e. tools that change cloud resources.
+MUTATING_TOOLS = set()
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Parameters
+    ----------
+    name : str
+        Name used when reporting statistics.
+    ttl : float
+        Seconds an entry stays valid.
+    maxsize : int
+        Maximum number of entries kept; the least recently used entry is evicted first.
+    tags : tuple
+        Resource tags this cache depends on. Invalidating a tag clears the cache.
+    """
+
+    def __init__(self, name, ttl, maxsize=128, tags=()):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.tags = frozenset(tags)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped by every clear, so a result computed before an invalidation is not stored after it.
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, generation=None):
+        """Store `value`, unless the cache was cleared since `generation` was read."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "ttl": self.ttl,
+            }
+
+
+def _make_key(signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return tuple((name, repr(value)) for name, value in bound.arguments.items())
+
+
+def cached_tool(ttl, maxsize=128, tags=(), cache_if=None):
+    """
+    Decorator that caches a read-only tool's results for `ttl` seconds.
+
+    Results are keyed on the tool's bound arguments (defaults applied), so
+    `get_ec2_info()` and `get_ec2_info(max_results=20)` share an entry. The
+    wrapper keeps the tool's name, docstring and signature, so Swarm builds
+    the same schema for it.
+
+    Parameters
+    ----------
+    ttl : float
+        Seconds a result stays valid.
+    maxsize : int, optional
+        Maximum number of cached argument combinations.
+    tags : tuple, optional
+        Resource tags the tool reads. Mutating tools decorated with
+        `invalidates` on any of these tags clear the cache.
+    cache_if : callable, optional
+        Predicate on the result; results it rejects (e.g., error messages) are not cached.
+    """
+    def decorator(func):
+        cache = TTLCache(func.__name__, ttl, maxsize, tags)
+        signature = inspect.signature(func)
+        with _registry_lock:
+            _registry[func.__name__] = cache
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TOOL_CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            key = _make_key(signature, args, kwargs)
+            hit, value = cache.get(key)
+            if hit:
+                return value
+
+            # A mutation that invalidates the cache while `func` runs makes its result stale.
+            generation = cache.generation
+            value = func(*args, **kwargs)
+            if cache_if is None or cache_if(value):
+                cache.set(key, value, generation)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*tags):
+    """
+    Decorator for mutating tools: clear every cache that depends on `tags` after the call.
+
+    The caches are cleared even if the tool fails, since a failed mutation
+    may still have changed the underlying resources.
+    """
+    def decorator(func):
+        MUTATING_TOOLS.add(func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                invalidate(*tags)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*tags):
+    """
+    Clear every registered cache that depends on any of `tags`.
+
+    Returns
+    -------
+    list
+        Names of the caches that were cleared.
+    """
+    with _registry_lock:
+        caches = [cache for cache in _registry.values() if cache.tags & set(tags)]
+    for cache in caches:
+        cache.clear()
+    return [cache.name for cache in caches]
+
+
+def cache_stats():
+    """
+    Return hit/miss/eviction counters for every registered tool cache.
+
+    Returns
+    -------
+    dict
+        Statistics keyed by tool name.
+    """
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def format_stats():
+    """Format the counters of every tool cache that was used as one line per tool."""
+    lines = [
+        f"{name}: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions, "
+        f"{stats['size']} cached"
+        for name, stats in sorted(cache_stats().items()) if stats["hits"] or stats["misses"]
+    ]
+    return "\n".join(lines) or "No cached tool calls."
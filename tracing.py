@@ -0,0 +1,326 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+
+from chat_client import ChatClientWrapper
+
+
+# JSONL file spans are exported to, one OpenTelemetry-style span per line. Unset disables export.
+TRACE_FILE = os.environ.get("TRACE_FILE")
+
+_current = contextvars.ContextVar("current_span", default=None)
+_lock = threading.Lock()
+_trace_file = None
+_stats = defaultdict(lambda: {"count": 0, "errors": 0, "seconds": 0.0, "max": 0.0})
+_llm_stats = {"calls": 0, "ttft_seconds": 0.0, "streamed_calls": 0, "tokens_in": 0, "tokens_out": 0}
+
+
+class Span:
+    """A timed operation; spans started while another is current become its children."""
+
+    def __init__(self, name, kind, attributes=None, parent=None, start_ns=None):
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def seconds(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def end(self, end_ns=None, error=None):
+        self.end_ns = end_ns or time.time_ns()
+        if error is not None:
+            self.error = str(error)
+        _finish(self)
+
+    def to_dict(self):
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.seconds * 1000, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+def configure(trace_file=None):
+    """Export finished spans to `trace_file` (JSONL), or stop exporting if None."""
+    global _trace_file
+
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(trace_file, "a") if trace_file else None
+
+
+def _finish(span):
+    key = (span.kind, span.name)
+    with _lock:
+        stats = _stats[key]
+        stats["count"] += 1
+        stats["seconds"] += span.seconds
+        stats["max"] = max(stats["max"], span.seconds)
+        if span.error:
+            stats["errors"] += 1
+        if _trace_file is not None:
+            _trace_file.write(json.dumps(span.to_dict(), default=str) + "\n")
+            _trace_file.flush()
+
+
+@contextmanager
+def span(name, kind="internal", **attributes):
+    """
+    Time the enclosed block as a span, nested under the current span if there is one.
+
+    Yields
+    ------
+    Span
+        The span, so attributes can be added while it runs.
+    """
+    current = Span(name, kind, attributes, parent=_current.get())
+    token = _current.set(current)
+    error = None
+    try:
+        yield current
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        current.end(error=error)
+
+
+def traced_tool(func):
+    """
+    Wrap an agent function so each call is recorded as a 'tool' span, or a 'handoff' span if it returns an agent.
+
+    The wrapper keeps the function's name and signature.
+    """
+    if getattr(func, "__traced__", False):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__, kind="tool") as s:
+            result = func(*args, **kwargs)
+            # Swarm agents are recognised by shape so this module does not depend on swarm.
+            if hasattr(result, "instructions") and hasattr(result, "functions"):
+                s.kind = "handoff"
+                s.set(target_agent=result.name)
+            return result
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+# boto3: every API call, including paginator pages and retries, becomes an 'aws' span.
+
+def _aws_start_call(model, context, **kwargs):
+    context["trace_span"] = Span(
+        f"{model.service_model.service_name}.{model.name}", "aws", parent=_current.get()
+    )
+
+
+def _aws_after_call(model, context, http_response=None, **kwargs):
+    current = context.pop("trace_span", None)
+    if current is not None:
+        current.set(status_code=getattr(http_response, "status_code", None))
+        current.end()
+
+
+def _aws_after_call_error(context, exception, **kwargs):
+    current = context.pop("trace_span", None)
+    if current is not None:
+        current.end(error=exception)
+
+
+def instrument_boto3_client(client):
+    """Register tracing hooks on a botocore client and return it."""
+    # provide-client-params is the first per-call event, so the span covers parameter building and signing too.
+    client.meta.events.register("provide-client-params", _aws_start_call)
+    client.meta.events.register("after-call", _aws_after_call)
+    client.meta.events.register("after-call-error", _aws_after_call_error)
+    return client
+
+
+# Azure: every HTTP request of a management client, including LRO polls, becomes an 'azure' span.
+
+def _azure_request_hook(request):
+    http_request = request.http_request
+    path = http_request.url.split("?")[0].split("/providers/")[-1]
+    request.context["trace_span"] = Span(f"{http_request.method} {path}", "azure", parent=_current.get())
+
+
+def _azure_response_hook(response):
+    current = response.context.get("trace_span")
+    if current is not None:
+        response.context["trace_span"] = None
+        status = response.http_response.status_code
+        current.set(status_code=status)
+        current.end(error=f"HTTP {status}" if status >= 400 else None)
+
+
+def azure_client_hooks():
+    """Keyword arguments that make an Azure management client record spans."""
+    return {"raw_request_hook": _azure_request_hook, "raw_response_hook": _azure_response_hook}
+
+
+# LLM: wraps the OpenAI client passed to Swarm.
+
+def _estimate_tokens(text):
+    return len(text or "") // 4
+
+
+class TracingClient(ChatClientWrapper):
+    """
+    Wrap an OpenAI client so every chat completion is recorded as an 'llm' span.
+
+    Records total generation time and, for streams, time to first token.
+    Token counts come from the response usage when the server reports it and
+    are estimated from text length otherwise.
+    """
+
+    def __init__(self, client):
+        super().__init__(client)
+
+    def _create(self, params):
+        messages = params.get("messages") or []
+        current = Span(params.get("model") or "llm", "llm", parent=_current.get())
+        current.set(
+            model=params.get("model"),
+            stream=bool(params.get("stream")),
+            messages=len(messages),
+            tokens_in=sum(_estimate_tokens(m.get("content")) for m in messages),
+            tokens_estimated=True,
+        )
+        try:
+            response = self.client.chat.completions.create(**params)
+        except Exception as e:
+            current.end(error=e)
+            raise
+
+        if params.get("stream"):
+            return self._trace_stream(current, response)
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            current.set(tokens_in=usage.prompt_tokens, tokens_out=usage.completion_tokens, tokens_estimated=False)
+        else:
+            message = response.choices[0].message
+            current.set(tokens_out=_estimate_tokens(message.content))
+        self._end(current)
+        return response
+
+    def _trace_stream(self, current, stream):
+        text_size = 0
+        first_token_ns = None
+        error = None
+        try:
+            for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta
+                    piece = (delta.content or "") + "".join(
+                        (tc.function.arguments or "") + (tc.function.name or "")
+                        for tc in (delta.tool_calls or []) if tc.function
+                    )
+                    if piece and first_token_ns is None:
+                        first_token_ns = time.time_ns()
+                    text_size += len(piece)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if first_token_ns is not None:
+                current.set(ttft_ms=round((first_token_ns - current.start_ns) / 1e6, 3))
+            current.set(tokens_out=text_size // 4)
+            self._end(current, error)
+
+    def _end(self, current, error=None):
+        current.end(error=error)
+        with _lock:
+            _llm_stats["calls"] += 1
+            _llm_stats["tokens_in"] += current.attributes.get("tokens_in") or 0
+            _llm_stats["tokens_out"] += current.attributes.get("tokens_out") or 0
+            if "ttft_ms" in current.attributes:
+                _llm_stats["streamed_calls"] += 1
+                _llm_stats["ttft_seconds"] += current.attributes["ttft_ms"] / 1000
+
+
+def span_stats():
+    """
+    Return aggregate counters of finished spans.
+
+    Returns
+    -------
+    dict
+        {(kind, name): {'count', 'errors', 'seconds', 'max'}} plus the LLM totals under 'llm'.
+    """
+    with _lock:
+        stats = {key: dict(value) for key, value in _stats.items()}
+        stats["llm"] = dict(_llm_stats)
+    return stats
+
+
+def reset_stats():
+    """Forget every aggregated span, e.g. between benchmark runs."""
+    with _lock:
+        _stats.clear()
+        for key in _llm_stats:
+            _llm_stats[key] = 0
+
+
+def profile_summary():
+    """
+    Summarize every finished span by kind and name: where the time went.
+
+    Returns
+    -------
+    str
+        A table of call counts, total, mean and max durations, followed by LLM token and TTFT totals.
+    """
+    stats = span_stats()
+    llm = stats.pop("llm")
+
+    if not stats:
+        return "No spans were recorded."
+
+    lines = [f"{'kind':<9} {'name':<48} {'calls':>6} {'errors':>6} {'total s':>9} {'mean s':>8} {'max s':>8}"]
+    for (kind, name), s in sorted(stats.items(), key=lambda item: item[1]["seconds"], reverse=True):
+        lines.append(f"{kind:<9} {name[:48]:<48} {s['count']:>6} {s['errors']:>6} {s['seconds']:>9.3f} "
+                     f"{s['seconds'] / s['count']:>8.3f} {s['max']:>8.3f}")
+
+    by_kind = defaultdict(float)
+    for (kind, _), s in stats.items():
+        by_kind[kind] += s["seconds"]
+    lines.append("Total by kind: " + ", ".join(f"{kind} {seconds:.2f}s" for kind, seconds in
+                                               sorted(by_kind.items(), key=lambda item: item[1], reverse=True)))
+    if llm["calls"]:
+        mean_ttft = llm["ttft_seconds"] / llm["streamed_calls"] if llm["streamed_calls"] else 0.0
+        lines.append(f"LLM: {llm['calls']} calls, {llm['tokens_in']} tokens in, {llm['tokens_out']} tokens out, "
+                     f"mean time to first token {mean_ttft:.3f}s")
+    return "\n".join(lines)
+
+
+if TRACE_FILE:
+    configure(TRACE_FILE)